@@ -1,12 +1,13 @@
-from typing import List, Callable
-import json
+from typing import List, Callable, Union
+import uuid
 
-from .llm import Prompt
+from .llm import Prompt, ToolCall
 from .action import ActionRegistry
 from .environment import Environment
 from .goal import Goal
 from .agent_language import AgentLanguage
 from .memory import Memory
+from .json_utils import json_dumps
 
 
 # Agent：智能体主循环
@@ -17,7 +18,7 @@ class Agent:
                  goals: List[Goal],
                  agent_language: AgentLanguage,
                  action_registry: ActionRegistry,
-                 generate_response: Callable[[Prompt], str],
+                 generate_response: Callable[[Prompt], Union[str, ToolCall]],
                  environment: Environment):
         """
         使用核心的 GAME 组件初始化智能体：
@@ -31,15 +32,19 @@ class Agent:
         self.agent_language = agent_language
         self.actions = action_registry
         self.environment = environment
+        self.conversation_id = uuid.uuid4().hex
 
     def construct_prompt(self, goals: List[Goal], memory: Memory, actions: ActionRegistry) -> Prompt:
         """基于当前目标、记忆与动作集合构造提示词（Prompt）"""
-        return self.agent_language.construct_prompt(
+        prompt = self.agent_language.construct_prompt(
             actions=actions.get_actions(),
             environment=self.environment,
             goals=goals,
             memory=memory
         )
+        # 同一次运行内使用固定的会话 ID，供 LLM 服务按会话复用已缓存的提示词前缀
+        prompt.metadata["conversation_id"] = self.conversation_id
+        return prompt
 
     def get_action(self, response):
         # 解析 LLM 的返回，得到动作名与参数（invocation）
@@ -47,7 +52,7 @@ class Agent:
         action = self.actions.get_action(invocation["tool"])
         return action, invocation
 
-    def should_terminate(self, response: str) -> bool:
+    def should_terminate(self, response: Union[str, ToolCall]) -> bool:
         # 若当前选择的动作被标记为 terminal，则结束主循环
         action_def, _ = self.get_action(response)
         return action_def.terminal
@@ -58,7 +63,7 @@ class Agent:
         memory.add_memory({"type": "user", "content": task})
 
     @staticmethod
-    def update_memory(memory: Memory, response: str, result: dict):
+    def update_memory(memory: Memory, response: Union[str, ToolCall], result: dict):
         """
         使用“决策 + 执行结果”更新记忆：
         - 将助手的决策（response）作为 assistant 事件存入
@@ -67,12 +72,12 @@ class Agent:
         # 统一把“助手的决策（response）”与“环境执行结果（result）”写入记忆
         new_memories = [
             {"type": "assistant", "content": response},
-            {"type": "environment", "content": json.dumps(result)}
+            {"type": "environment", "content": json_dumps(result)}
         ]
         for m in new_memories:
             memory.add_memory(m)
 
-    def prompt_llm_for_action(self, full_prompt: Prompt) -> str:
+    def prompt_llm_for_action(self, full_prompt: Prompt) -> Union[str, ToolCall]:
         # 将 Prompt 发送给 LLM，得到“下一步动作/或文本回复”
         response = self.generate_response(full_prompt)
         return response
@@ -85,6 +90,8 @@ class Agent:
         if memory is None:
             memory = Memory()
 
+        self.conversation_id = uuid.uuid4().hex
+
         # 将用户输入作为当前任务写入记忆
         self.set_current_task(memory, user_input)
 
@@ -1,11 +1,13 @@
+from functools import lru_cache
 from typing import List, Any
 import json
 
-from .llm import Prompt
+from .llm import Prompt, ToolCall
 from .action import Action
 from .environment import Environment
 from .memory import Memory
 from .goal import Goal
+from .json_utils import json_loads
 
 
 # AgentLanguage：语言适配层
@@ -51,16 +53,14 @@ class AgentFunctionCallingActionLanguage(AgentLanguage):
         # 记忆格式化策略：
         # - environment 的输出也作为 assistant 角色加入（让模型能“看到”工具执行结果）
         # - user/assistant 原样映射
-        items = memory.get_memories()
         mapped_items = []
-        for item in items:
-            content = item.get("content", None)
+        for typ, content in memory.iter_memories():
             if not content:
-                content = json.dumps(item, indent=4)
+                content = json.dumps({"type": typ, "content": content}, indent=4)
 
-            if item["type"] == "assistant":
+            if typ == "assistant":
                 mapped_items.append({"role": "assistant", "content": content})
-            elif item["type"] == "environment":
+            elif typ == "environment":
                 mapped_items.append({"role": "assistant", "content": content})
             else:
                 mapped_items.append({"role": "user", "content": content})
@@ -70,6 +70,12 @@ class AgentFunctionCallingActionLanguage(AgentLanguage):
     @staticmethod
     def format_actions(actions: List[Action]) -> [List, List]:
         """将已注册的动作转换为 OpenAI 函数调用所需的 tools Schema"""
+        # 同一组动作每轮都返回同一份 Schema，保证请求前缀逐字节一致，便于服务端命中提示词缓存
+        return AgentFunctionCallingActionLanguage._tools_schema(tuple(actions))
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _tools_schema(actions: tuple) -> List:
         tools = [
             {
                 "type": "function",
@@ -109,12 +115,16 @@ class AgentFunctionCallingActionLanguage(AgentLanguage):
         # 解析失败后的“自适应 Prompt”策略（此处保留扩展点，演示版不做修改）
         return prompt
 
-    def parse_response(self, response: str) -> dict:
+    def parse_response(self, response) -> dict:
         """将 LLM 的响应解析为结构化格式（优先尝试 JSON 解析，失败则回退为终止工具）"""
 
-        # 期望 LLM 返回 JSON 字符串：{"tool": 工具名, "args": {...}}
+        # 函数调用已由 generate_response 解析为 ToolCall，直接取用即可
+        if isinstance(response, ToolCall):
+            return {"tool": response.name, "args": response.args}
+
+        # 否则期望 LLM 返回 JSON 字符串：{"tool": 工具名, "args": {...}}
         try:
-            return json.loads(response)
+            return json_loads(response)
 
         except Exception as e:
             # 若无法解析，则将内容作为 message 交给终止工具，友好退出
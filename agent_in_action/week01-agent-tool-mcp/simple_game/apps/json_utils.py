@@ -0,0 +1,33 @@
+import json
+
+# JSON 编解码的统一入口：
+# - 优先使用 orjson（Rust 实现，解析/序列化小对象比标准库快数倍），用于工具参数、记忆内容等热路径
+# - 未安装 orjson 时退回标准库 json，行为保持一致
+# - json_dumps_indent 用于报告展示的缩进输出；json_dumpb 直接产出 bytes，用于拼接请求体
+try:
+    import orjson
+
+    def json_loads(data):
+        return orjson.loads(data)
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def json_dumps_indent(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
+    def json_dumpb(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+except ImportError:  # pragma: no cover - 可选依赖
+    def json_loads(data):
+        return json.loads(data)
+
+    def json_dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    def json_dumps_indent(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, indent=2)
+
+    def json_dumpb(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
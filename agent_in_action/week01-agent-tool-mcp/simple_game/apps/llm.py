@@ -1,7 +1,14 @@
-from openai import OpenAI  # 用于调用OpenAI API
+from openai import OpenAI, Stream, RateLimitError, APIConnectionError, InternalServerError  # 用于调用OpenAI API
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 from dataclasses import dataclass, field
-from typing import List, Callable, Dict, Any
-import os, json
+from typing import List, Callable, Dict, Any, Iterator, Union, Tuple
+import atexit
+import httpx
+import os
+
+from .json_utils import json_loads, json_dumps, json_dumpb
+from .response_cache import get_response_cache
 
 
 # Prompt：封装要发给 LLM 的消息与工具定义
@@ -14,51 +21,184 @@ class Prompt:
     tools: List[Dict] = field(default_factory=list)
     metadata: dict = field(default_factory=dict)
 
+
+# ToolCall：LLM 选择的工具调用（工具名 + 已解析的参数）
+# - 直接交给 Agent 分发执行，省去 dict -> JSON 字符串 -> dict 的来回序列化
+# - 只有在写入记忆并被读取时才序列化为 {"tool": ..., "args": ...} 的 JSON 字符串
+@dataclass(slots=True)
+class ToolCall:
+    name: str
+    args: dict
+
+    def to_json(self) -> str:
+        return json_dumps({"tool": self.name, "args": self.args})
+
+# 共享的 HTTP 连接池：Agent 主循环会连续发起多次小请求，复用连接可省去每次的 TCP/TLS 握手
+_http = httpx.Client(
+    timeout=30,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+)
+atexit.register(_http.close)
+
 # 大语言模型
 client = OpenAI(
     base_url=os.getenv("OPENAI_API_BASE"),
-    api_key=os.getenv("OPENAI_API_KEY")
+    api_key=os.getenv("OPENAI_API_KEY"),
+    http_client=_http,
+    max_retries=0,  # 重试统一交给下方的 _create_completion，避免 SDK 内置重试与其叠加
 )
 
+# 可重试的错误：限流（429）、网络连接/超时、服务端 5xx
+_RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+_backoff = wait_random_exponential(multiplier=1, max=60)
+
+
+def _wait_retry_after(retry_state) -> float:
+    """429 时优先按服务端 Retry-After 头等待，否则指数退避 + 随机抖动"""
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, RateLimitError):
+        try:
+            return float(exc.response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    return _backoff(retry_state)
+
+
+# 所有 chat.completions 调用共用的重试策略：瞬时错误只重试这一次请求，而不是整轮 Agent 循环
+_retry_policy = retry(
+    wait=_wait_retry_after,
+    retry=retry_if_exception_type(_RETRYABLE_ERRORS),
+    stop=stop_after_attempt(6),
+    reraise=True,
+)
+
+
+@_retry_policy
+def _create_completion(**kwargs):
+    return client.chat.completions.create(**kwargs)
+
+
+@_retry_policy
+def _post_completion_stream(payload: bytes) -> Stream[ChatCompletionChunk]:
+    # 直接发送已拼好的 JSON 请求体，跳过 SDK 对参数的再次序列化
+    return client.post(
+        "/chat/completions",
+        cast_to=ChatCompletion,
+        content=payload,
+        options={"headers": {"Content-Type": "application/json"}},
+        stream=True,
+        stream_cls=Stream[ChatCompletionChunk],
+    )
+
+
+# 工具 Schema 的 JSON 缓存：同一会话里 tools 列表不变（见 AgentFunctionCallingActionLanguage._tools_schema），
+# 以列表对象的 id 为键，只序列化一次；同时保存列表本身，防止 id 被复用
+_TOOLS_REQUEST_HEAD: Dict[int, Tuple[List[Dict], bytes]] = {}
+
+
+def _tools_request_head(tools: List[Dict]) -> bytes:
+    cached = _TOOLS_REQUEST_HEAD.get(id(tools))
+    if cached is None or cached[0] is not tools:
+        head = (b'{"model":"gpt-4o","tool_choice":"auto","max_tokens":1024,"stream":true,"tools":'
+                + json_dumpb(tools))
+        cached = _TOOLS_REQUEST_HEAD[id(tools)] = (tools, head)
+    return cached[1]
+
+
+def _build_tools_payload(prompt: Prompt) -> bytes:
+    """拼接带工具的请求体：固定的 model/tools 部分取缓存，每轮只序列化 messages 与会话 ID"""
+    parts = [_tools_request_head(prompt.tools), b',"messages":', json_dumpb(prompt.messages)]
+    conversation_id = prompt.metadata.get("conversation_id")
+    if conversation_id:
+        encoded_id = json_dumpb(conversation_id)
+        parts += [b',"user":', encoded_id, b',"prompt_cache_key":', encoded_id]
+    parts.append(b'}')
+    return b"".join(parts)
+
+
+def _cache_kwargs(prompt: Prompt) -> Dict[str, Any]:
+    """根据 Prompt 元数据中的会话 ID 生成提示词缓存相关的请求参数"""
+    conversation_id = prompt.metadata.get("conversation_id")
+    if not conversation_id:
+        return {}
+    # 通过 extra_body 传递，兼容不认识该字段的 OpenAI 兼容服务
+    return {"user": conversation_id, "extra_body": {"prompt_cache_key": conversation_id}}
+
 
 # generate_response：统一的 LLM 调用入口
 # - 入参是 Prompt，内部自动根据是否提供 tools 来决定是否启用函数调用能力
 # - 目标：把模型提供商与主循环解耦；将来切换模型时无需改 Agent 逻辑
+# - 使用流式输出：拿到完整的第一个工具调用后即可停止读取，不必等待整段响应生成完毕
+# - 提示词缓存：system + tools 位于请求最前且每轮不变，再带上会话 ID 作为缓存键，
+#   服务端可复用已处理过的前缀，跳过重复的 prefill 计算
+# - 开发期响应缓存：设置 AI_CACHE=1 后，相同的 (model, messages, tools) 直接返回上次的结果
 # - 返回：
 #   * 无工具时：直接返回助手文本
-#   * 有工具时：优先解析 tool_calls（并转为 {tool, args} 的 JSON 字符串）
+#   * 有工具时：优先解析 tool_calls（返回 ToolCall）
 #               若无工具调用，则退化为普通文本回复
-def generate_response(prompt: Prompt) -> str:
-    messages = prompt.messages
-    tools = prompt.tools
+def generate_response(prompt: Prompt) -> Union[str, ToolCall]:
+    cache = get_response_cache()
+    if cache is None:
+        return _generate_response(prompt)
+
+    key = cache.make_key(model="gpt-4o", messages=prompt.messages, tools=prompt.tools, max_tokens=1024)
+    result = cache.get(key)
+    if result is None:
+        result = _generate_response(prompt)
+        cache.set(key, result)
+    return result
+
 
-    if not tools:
+def _generate_response(prompt: Prompt) -> Union[str, ToolCall]:
+    if not prompt.tools:
         # 无工具：普通对话
-        response = client.chat.completions.create(
-            model="gpt-4o",  # 指定使用的模型
-            messages=messages,  # 发送消息历史
-            max_tokens=1024  # 限制响应长度
-        )
-        result = response.choices[0].message.content
-    else:
-        # 有工具：提示模型按函数调用格式返回 tool_calls
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
-            tools=tools,
-            max_tokens=1024
-        )
-        if response.choices[0].message.tool_calls:
-            # 这里仅取第一个工具调用作为最小可运行演示
-            tool = response.choices[0].message.tool_calls[0]
-            result = {
-                "tool": tool.function.name,
-                "args": json.loads(tool.function.arguments),
-            }
-            # 将 dict 序列化为字符串，便于统一处理与存入记忆
-            result = json.dumps(result)
-
-        else:
-            result = response.choices[0].message.content
+        return "".join(generate_response_stream(prompt))
 
-    return result
+    # 有工具：提示模型按函数调用格式返回 tool_calls
+    stream = _post_completion_stream(_build_tools_payload(prompt))
+
+    content_parts = []
+    tool_name = None
+    tool_args_parts = []
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            delta = choice.delta
+            if delta.content:
+                content_parts.append(delta.content)
+            first_call_done = False
+            for tool_call in delta.tool_calls or []:
+                # 这里仅取第一个工具调用作为最小可运行演示；出现第二个工具调用说明第一个已完整
+                if tool_call.index != 0:
+                    first_call_done = True
+                    break
+                if tool_call.function.name:
+                    tool_name = tool_call.function.name
+                if tool_call.function.arguments:
+                    tool_args_parts.append(tool_call.function.arguments)
+            if first_call_done or choice.finish_reason is not None:
+                break
+    finally:
+        # 提前结束时关闭连接，让服务端停止生成
+        stream.close()
+
+    if tool_name:
+        return ToolCall(tool_name, json_loads("".join(tool_args_parts) or "{}"))
+
+    return "".join(content_parts)
+
+
+# generate_response_stream：文本模式的流式版本，逐段产出模型生成的内容
+def generate_response_stream(prompt: Prompt) -> Iterator[str]:
+    stream = _create_completion(
+        model="gpt-4o",  # 指定使用的模型
+        messages=prompt.messages,  # 发送消息历史
+        max_tokens=1024,  # 限制响应长度
+        stream=True,
+        **_cache_kwargs(prompt)
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
@@ -1,24 +1,49 @@
-from typing import List, Dict
+from typing import List, Dict, Iterator, Tuple, Any
+
+from .llm import ToolCall
 
 # Memory：回合记忆
-# - items：统一存储“用户/助手/环境”等事件，形成对话历史
-# - 通过 get_memories 提供最近N条消息给提示构造使用
+# - 统一存储“用户/助手/环境”等事件，形成对话历史
+# - 以两列并行列表保存（types / contents，即 SoA 布局）：按类型分发时只需遍历 types，不必逐条查字典
+# - 通过 get_memories 提供最近N条消息给提示构造使用；iter_memories 直接按 (type, content) 遍历
 # - 通过 copy_without_system_memories 可过滤掉系统消息（某些场景需要）
 class Memory:
     def __init__(self):
-        self.items = []  # Basic conversation history
+        self.types: List[str] = []  # 每条记忆的类型
+        self.contents: List[Any] = []  # 每条记忆的内容
+        self._pending = []  # content 仍为 ToolCall、尚未序列化的记忆下标
+
+    def __len__(self) -> int:
+        return len(self.types)
 
     def add_memory(self, memory: dict):
-        """将一条记忆事件追加到工作记忆，用于后续提示词构造与推理"""
-        self.items.append(memory)
+        """将一条记忆事件追加到工作记忆，用于后续提示词构造与推理；content 可以是字符串或 ToolCall"""
+        content = memory.get("content")
+        if isinstance(content, ToolCall):
+            self._pending.append(len(self.contents))
+        self.types.append(memory["type"])
+        self.contents.append(content)
+
+    def _flush_pending(self):
+        # 对外提供时才把 ToolCall 序列化为 JSON 字符串，且每条只序列化一次
+        for i in self._pending:
+            self.contents[i] = self.contents[i].to_json()
+        self._pending.clear()
+
+    def iter_memories(self, limit: int = None) -> Iterator[Tuple[str, Any]]:
+        """按 (type, content) 遍历对话历史，不构造中间字典"""
+        self._flush_pending()
+        return zip(self.types[:limit], self.contents[:limit])
 
     def get_memories(self, limit: int = None) -> List[Dict]:
         """获取用于提示词的对话历史；可通过 limit 限制条数以控制上下文长度"""
-        return self.items[:limit]
+        return [{"type": t, "content": c} for t, c in self.iter_memories(limit)]
 
     def copy_without_system_memories(self):
         """返回一份不包含系统类型（type==system）记忆的副本，用于部分提示场景"""
-        filtered_items = [m for m in self.items if m["type"] != "system"]
         memory = Memory()
-        memory.items = filtered_items
+        for t, c in self.iter_memories():
+            if t != "system":
+                memory.types.append(t)
+                memory.contents.append(c)
         return memory
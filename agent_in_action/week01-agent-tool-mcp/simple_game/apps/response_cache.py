@@ -0,0 +1,45 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+from typing import Any, Optional
+
+
+# ResponseCache：开发期的 LLM 响应缓存（SQLite 持久化）
+# - 键：blake2b(规范化 JSON(model, messages, tools, ...))，相同请求命中同一条缓存
+# - 值：pickle 后的调用结果；反复调试、重复评测时直接复用，省去网络往返
+# - 默认关闭，设置环境变量 AI_CACHE=1 启用；AI_CACHE_PATH 可指定缓存文件位置
+class ResponseCache:
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS responses (key BLOB PRIMARY KEY, value BLOB)")
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(**request) -> bytes:
+        canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return hashlib.blake2b(canonical.encode("utf-8"), digest_size=32).digest()
+
+    def get(self, key: bytes) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def set(self, key: bytes, value: Any):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO responses (key, value) VALUES (?, ?)", (key, pickle.dumps(value)))
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """AI_CACHE=1 时返回进程内共享的缓存实例，否则返回 None"""
+    global _cache
+    if os.getenv("AI_CACHE") != "1":
+        return None
+    if _cache is None:
+        _cache = ResponseCache(os.getenv("AI_CACHE_PATH", ".ai_cache.sqlite3"))
+    return _cache
@@ -7,7 +7,7 @@ from apps.agent import Agent
 from apps.goal import Goal
 from apps.memory import Memory
 
-from pathlib import Path
+from functools import lru_cache
 from typing import List
 
 
@@ -35,27 +35,42 @@ agent_language = AgentFunctionCallingActionLanguage()
 
 
 # 3) 实现底层动作：读取文件
+@lru_cache(maxsize=512)
+def _read_file_cached(path: str, mtime_ns: int, size: int) -> str:
+    # mtime/size 只作为缓存键的一部分：文件被修改后键会变化，自动读到新内容
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8")
+
+
 def read_project_file(name: str) -> str:
-    with open(name, "r") as f:
-        return f.read()
+    st = os.stat(name)
+    return _read_file_cached(os.path.abspath(name), st.st_mtime_ns, st.st_size)
 
 
 # 4) 实现底层动作：列出当前目录及子目录下的 .py 文件（最小示例）
-def list_project_files() -> List[str]:
+# 项目根目录可通过环境变量 PROJECT_ROOT 指定，默认为当前目录
+PROJECT_ROOT = os.getenv("PROJECT_ROOT", ".")
+
+
+def _iter_py_files(root: str):
     """
-    使用 pathlib.Path.rglob 递归查找所有 .py 文件。
+    使用 os.scandir 递归遍历目录，产出所有 .py 文件路径。
+    DirEntry 自带目录遍历时拿到的类型信息，无需像 Path.is_file() 那样对每个条目再做一次 stat。
     """
-    # 1. Path(".") 代表当前目录
-    # 2. .rglob("*.py") 递归地 (r) 查找 (glob) 所有匹配 "*.py" 的文件
-
-    # rglob 会返回一个生成器，包含所有匹配的 Path 对象
-    py_files_paths = Path("/Users/gaorj/PycharmProjects/Learning/ai-quickstart/agent_in_action/week01/mcp_demo").rglob("*.py")
+    with os.scandir(root) as it:
+        for entry in it:
+            # 跳过符号链接，避免循环引用
+            if entry.is_symlink():
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_py_files(entry.path)
+            elif entry.name.endswith(".py") and entry.is_file(follow_symlinks=False):
+                yield entry.path
 
-    # 3. 将 Path 对象转换为字符串，并确保它们是文件（排除目录）
-    #    str(p) 会自动生成正确的相对路径（例如 'my_app/helpers.py'）
-    files = [str(p) for p in py_files_paths if p.is_file()]
 
-    return sorted(files)
+def list_project_files(root: str = PROJECT_ROOT) -> List[str]:
+    """递归查找项目目录下所有 .py 文件，按路径排序返回"""
+    return sorted(_iter_py_files(root))
 
 
 # 5) 注册动作：将 Python 函数“暴露”为可被 LLM 选择的工具
@@ -110,15 +125,12 @@ if __name__ == "__main__":
     print(final_memory.get_memories())
 
     # 将智能体运行结果以 Markdown 形式美化展示
+    import io
     from IPython.display import display, Markdown
-    import json
+    from apps.json_utils import json_loads, json_dumps_indent
 
 
-    def _format_env_result(env_json_str: str) -> str:
-        try:
-            obj = json.loads(env_json_str)
-        except Exception:
-            return env_json_str
+    def _format_env_result(obj) -> str:
         if isinstance(obj, dict) and obj.get("tool_executed") is True:
             result = obj.get("result", "")
             ts = obj.get("timestamp", "")
@@ -129,70 +141,69 @@ if __name__ == "__main__":
                 if result.strip().startswith("# ") or "\n## " in result:
                     return f"执行成功（{ts}）\n\n生成内容：\n\n```markdown\n{result}\n```"
                 return f"执行成功（{ts}）\n\n```text\n{result}\n```"
-            return f"执行成功（{ts}）\n\n```json\n{json.dumps(result, ensure_ascii=False, indent=2)}\n```"
+            return f"执行成功（{ts}）\n\n```json\n{json_dumps_indent(result)}\n```"
         if isinstance(obj, dict) and obj.get("tool_executed") is False:
             err = obj.get("error", "")
             tb = obj.get("traceback", "")
             return f"执行失败\n\n错误：`{err}`\n\n<details><summary>Traceback</summary>\n\n```text\n{tb}\n```\n\n</details>"
-        return f"```json\n{json.dumps(obj, ensure_ascii=False, indent=2)}\n```"
+        return f"```json\n{json_dumps_indent(obj)}\n```"
+
 
+    # 直接写入 StringIO，段落之间以空行分隔
+    buf = io.StringIO()
 
-    md_lines = [
-        "# 智能体执行报告",
-    ]
+    def w(block: str):
+        buf.write(block)
+        buf.write("\n\n")
+
+    w("# 智能体执行报告")
 
     if 'final_memory' not in globals():
         display(Markdown("> 未检测到 final_memory 变量，请先运行上方示例执行智能体。"))
     else:
-        memories = final_memory.get_memories()
-
         # 概览
-        md_lines.append("## 概览")
-        md_lines.append(f"- 总事件数：{len(memories)}")
-
-        # 逐步展示
-        md_lines.append("\n## 交互明细\n")
-        for idx, item in enumerate(memories, 1):
-            typ = item.get("type", "unknown")
-            content = item.get("content", "")
+        w("## 概览")
+        w(f"- 总事件数：{len(final_memory)}")
+
+        # 逐步展示；同一趟遍历中记下最后一次生成的 README，无需再倒序扫描一遍
+        w("\n## 交互明细\n")
+        readme_block = None
+        for idx, (typ, content) in enumerate(final_memory.iter_memories(), 1):
             if typ == "user":
-                md_lines.append(f"### 步骤 {idx} · 用户输入")
-                md_lines.append(f"> {content}")
+                w(f"### 步骤 {idx} · 用户输入")
+                w(f"> {content}")
             elif typ == "assistant":
-                md_lines.append(f"### 步骤 {idx} · 助手决策（工具调用）")
+                w(f"### 步骤 {idx} · 助手决策（工具调用）")
                 try:
-                    call = json.loads(content)
+                    call = json_loads(content)
                     tool = call.get("tool", "?")
                     args = call.get("args", {})
-                    md_lines.append(f"- 工具：`{tool}`")
-                    md_lines.append("- 参数：")
-                    md_lines.append(f"```json\n{json.dumps(args, ensure_ascii=False, indent=2)}\n```")
+                    w(f"- 工具：`{tool}`")
+                    w("- 参数：")
+                    w(f"```json\n{json_dumps_indent(args)}\n```")
                 except Exception:
-                    md_lines.append("- 文本回复：")
-                    md_lines.append(f"```text\n{content}\n```")
+                    w("- 文本回复：")
+                    w(f"```text\n{content}\n```")
             elif typ == "environment":
-                md_lines.append(f"### 步骤 {idx} · 环境执行结果")
-                md_lines.append(_format_env_result(content))
-            else:
-                md_lines.append(f"### 步骤 {idx} · 其他")
-                md_lines.append(f"```text\n{content}\n```")
-
-        # 摘取 README 内容（若存在 terminate 消息）
-        md_lines.append("\n## 生成的 README（若已终止并返回）\n")
-        readme_blocks = []
-        for item in memories[::-1]:
-            if item.get("type") == "environment":
+                w(f"### 步骤 {idx} · 环境执行结果")
                 try:
-                    obj = json.loads(item["content"]) if isinstance(item.get("content"), str) else item["content"]
-                    if obj.get("tool_executed") and isinstance(obj.get("result"), str) and obj[
-                        "result"].lstrip().startswith("# "):
-                        readme_blocks.append(obj["result"].replace("\nTerminating...", "").strip())
-                        break
+                    obj = json_loads(content) if isinstance(content, str) else content
                 except Exception:
-                    pass
-        if readme_blocks:
-            md_lines.append("```markdown\n" + readme_blocks[0] + "\n```")
+                    w(content)
+                    continue
+                w(_format_env_result(obj))
+                # 摘取 README 内容（若存在 terminate 消息）
+                if isinstance(obj, dict) and obj.get("tool_executed") and isinstance(obj.get("result"), str) \
+                        and obj["result"].lstrip().startswith("# "):
+                    readme_block = obj["result"].replace("\nTerminating...", "").strip()
+            else:
+                w(f"### 步骤 {idx} · 其他")
+                w(f"```text\n{content}\n```")
+
+        w("\n## 生成的 README（若已终止并返回）\n")
+        if readme_block:
+            w("```markdown\n" + readme_block + "\n```")
         else:
-            md_lines.append("> 本次执行未生成 README 内容或未调用终止工具。")
+            w("> 本次执行未生成 README 内容或未调用终止工具。")
 
-        display(Markdown("\n\n".join(md_lines)))
+        display(Markdown(buf.getvalue()))
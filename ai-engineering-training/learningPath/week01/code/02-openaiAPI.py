@@ -1,8 +1,12 @@
+import atexit
 import os
 from pydoc import cli
+import httpx
 from openai import OpenAI
 from dotenv import load_dotenv
 
+from response_cache import cached_completion
+
 load_dotenv()
 api_key = os.getenv('OPENAI_API_KEY')
 base_url = os.getenv('OPENAI_API_BASE')
@@ -11,9 +15,18 @@ if base_url is None or api_key is None:
     print("Please set the OPENAI_API_BASE and OPENAI_API_KEY environment variables.")
     exit(1)
 
-client = OpenAI(api_key=api_key, base_url=base_url)
+# 共享的 HTTP 连接池：多次调用复用 TCP/TLS 连接，省去每次请求的握手开销
+http_client = httpx.Client(
+    timeout=30,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+)
+atexit.register(http_client.close)
+
+client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
 
-response = client.chat.completions.create(
+# 设置 AI_CACHE=1 时，相同请求直接读取本地缓存的响应
+response = cached_completion(
+    client.chat.completions.create,
     model="o3-mini",
     messages=[
         {"role": "system", "content": "You are a helpful assistant."},
@@ -1,13 +1,28 @@
-import http.client
+import atexit
+import importlib.util
 import json
 import os
-import ssl
+import httpx
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential
 from dotenv import load_dotenv
 
 load_dotenv()
 
-context = ssl._create_unverified_context()
-conn = http.client.HTTPSConnection("api.gpt.ge", context=context)
+# 从环境变量获取API token
+
+api_token = os.getenv('OPENAI_API_KEY')  # 或者使用其他环境变量名
+
+# 共享的 HTTP 连接池：后续请求复用同一条连接，不再每次重新握手
+# - 使用默认的证书校验（verify=True），不再关闭 TLS 验证
+# - 安装了 h2（pip install "httpx[http2]"）时启用 HTTP/2，多个请求可复用同一连接并发传输
+client = httpx.Client(
+    base_url="https://api.gpt.ge",
+    http2=importlib.util.find_spec("h2") is not None,
+    timeout=30,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+    headers={"Authorization": f"Bearer {api_token}"},
+)
+atexit.register(client.close)
 payload = json.dumps({
    "model": "o3-mini",
    "messages": [
@@ -21,21 +36,45 @@ payload = json.dumps({
    "stream": False
 })
 
-# 从环境变量获取API token
-
-api_token = os.getenv('OPENAI_API_KEY')  # 或者使用其他环境变量名
-
 headers = {
    'Content-Type': 'application/json',
-   'Authorization': f'Bearer {api_token}'
 }
 # 打印出请求信息
 print(f"-- debug -- request payload is {payload}")
-print(f"-- debug -- request headers are {headers}")
+print(f"-- debug -- request headers are {dict(client.headers)}")
+
+_backoff = wait_random_exponential(multiplier=1, max=60)
+
+
+def _is_retryable(exc):
+    """网络错误、限流（429）和服务端 5xx 可重试"""
+    if isinstance(exc, httpx.TransportError):
+        return True
+    return isinstance(exc, httpx.HTTPStatusError) and (
+        exc.response.status_code == 429 or exc.response.status_code >= 500
+    )
+
+
+def _wait_retry_after(retry_state):
+    """429 时优先按服务端 Retry-After 头等待，否则指数退避 + 随机抖动"""
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, httpx.HTTPStatusError):
+        try:
+            return float(exc.response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    return _backoff(retry_state)
+
+
+@retry(wait=_wait_retry_after, retry=retry_if_exception(_is_retryable), stop=stop_after_attempt(6), reraise=True)
+def post_chat_completion(body, request_headers):
+    res = client.post("/v1/chat/completions", content=body, headers=request_headers)
+    res.raise_for_status()
+    return res
+
 
-conn.request("POST", "/v1/chat/completions", payload, headers)
-res = conn.getresponse()
-data = res.read()
+res = post_chat_completion(payload, headers)
+data = res.content
 
 # 打印原始响应
 print("原始响应:")
@@ -1,4 +1,5 @@
-import os, json
+import atexit, os, json, uuid
+import httpx
 from dotenv import load_dotenv
 from openai import OpenAI
 
@@ -9,7 +10,14 @@ base_url = os.getenv('OPENAI_API_BASE')
 
 print(f"debug base_url: {base_url}, api_key: {api_key[0:10]}******")
 
-client = OpenAI(api_key=api_key, base_url=base_url)
+# 共享的 HTTP 连接池：多次调用复用 TCP/TLS 连接，省去每次请求的握手开销
+http_client = httpx.Client(
+    timeout=30,
+    limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+)
+atexit.register(http_client.close)
+
+client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
 
 tools = [
     {
@@ -31,6 +39,9 @@ tools = [
     },
 ]
 
+# 会话 ID：两轮请求的 tools 与开头的消息保持不变，带上同一个缓存键，服务端可复用已缓存的提示词前缀
+conversation_id = uuid.uuid4().hex
+
 # 创建一个消息列表，随着时间推移会不断添加内容
 messages = [
     {"role": "user", "content": "我的运势如何？我是水瓶座。"}
@@ -48,6 +59,7 @@ response = client.chat.completions.create(
     model="gpt-4o-mini",
     tools=tools,
     messages=messages,
+    extra_body={"prompt_cache_key": conversation_id},
 )
 
 print("模型初始输出:")
@@ -101,6 +113,7 @@ response = client.chat.completions.create(
     model="gpt-4o-mini",
     tools=tools,
     messages=messages,
+    extra_body={"prompt_cache_key": conversation_id},
 )
 
 # 5. 模型应该能够给出响应！
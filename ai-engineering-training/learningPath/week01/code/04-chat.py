@@ -1,6 +1,13 @@
+import asyncio
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, RateLimitError, APIConnectionError, InternalServerError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+from prompt_toolkit import PromptSession
+from prompt_toolkit.patch_stdout import patch_stdout
+
+from response_cache import get_response_cache
 
 load_dotenv()
 
@@ -9,33 +16,108 @@ base_url = os.getenv('OPENAI_API_BASE')
 
 print(f"debug base_url: {base_url}, api_key: {api_key[0:10]}******")
 
-client = OpenAI(api_key=api_key, base_url=base_url)
-
-def query(user_prompt):
-    """
-    发送用户提示到 OpenAI API 并返回响应内容
-    
-    参数:
-        user_prompt (str): 用户输入的提示内容
-        
-    返回:
-        str: AI 的响应内容
-    """
-    
+# 异步客户端：供交互式 REPL 使用，用户输入下一个问题时上一个问题的回答仍可在后台生成；
+# 共享的 HTTP 连接池让多次调用复用 TCP/TLS 连接，重试交给下方的 tenacity 装饰器处理，关闭 SDK 内置重试以免叠加
+async_client = AsyncOpenAI(
+    api_key=api_key,
+    base_url=base_url,
+    http_client=httpx.AsyncClient(
+        timeout=30,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+    ),
+    max_retries=0,
+)
+
+_backoff = wait_random_exponential(multiplier=1, max=60)
+
+
+def _wait_retry_after(retry_state):
+    """限流（429）时优先按服务端 Retry-After 头等待，否则指数退避 + 随机抖动"""
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, RateLimitError):
+        try:
+            return float(exc.response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            pass
+    return _backoff(retry_state)
+
+
+@retry(
+    wait=_wait_retry_after,
+    retry=retry_if_exception_type((RateLimitError, APIConnectionError, InternalServerError)),
+    stop=stop_after_attempt(6),
+    reraise=True,
+)
+async def _acreate_completion(**kwargs):
+    """带重试的 chat.completions 调用：遇到限流、网络错误或服务端 5xx 时自动重试"""
+    return await async_client.chat.completions.create(**kwargs)
+
+
+async def handle(seq, user_prompt):
+    """在后台流式获取回答，按行输出并标注问题序号（多个回答可能同时在生成）"""
+    messages = [
+        {"role": "user", "content": user_prompt}
+    ]
     try:
-        response = client.chat.completions.create(
+        # 设置 AI_CACHE=1 时，相同问题直接输出本地缓存的完整回答
+        cache = get_response_cache()
+        key = cache.make_key(model="o3-mini", messages=messages) if cache else None
+        cached = cache.get(key) if cache else None
+        if cached is not None:
+            *done, line = cached.split("\n")
+            for text in done:
+                print(f"[{seq}] {text}")
+            if line:
+                print(f"[{seq}] {line}")
+            return
+
+        stream = await _acreate_completion(
             model="o3-mini",
-            messages=[
-                {"role": "user", "content": user_prompt}
-            ]
+            messages=messages,
+            stream=True
         )
-        return response.choices[0].message.content
+        parts = []
+        line = ""
+        async for chunk in stream:
+            if not (chunk.choices and chunk.choices[0].delta.content):
+                continue
+            parts.append(chunk.choices[0].delta.content)
+            line += chunk.choices[0].delta.content
+            *done, line = line.split("\n")
+            for text in done:
+                print(f"[{seq}] {text}")
+        if line:
+            print(f"[{seq}] {line}")
+        if cache:
+            cache.set(key, "".join(parts))
     except Exception as e:
-        return f"错误: {str(e)}"
+        print(f"[{seq}] 错误: {str(e)}")
+
+
+async def repl():
+    """异步交互循环：提问后立即可以输入下一个问题，回答在后台流式输出"""
+    session = PromptSession()
+    tasks = set()
+    seq = 0
+    with patch_stdout():
+        while True:
+            try:
+                user_prompt = await session.prompt_async("请输入您的问题: ")
+            except (EOFError, KeyboardInterrupt):
+                break
+            if user_prompt.lower() == "exit":
+                break
+            if not user_prompt.strip():
+                continue
+            seq += 1
+            task = asyncio.create_task(handle(seq, user_prompt))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        # 退出前等待仍在生成的回答
+        if tasks:
+            await asyncio.gather(*tasks)
+    await async_client.close()
+
 
 if __name__ == "__main__":
-    while True:
-        user_prompt = input("请输入您的问题: ")
-        if user_prompt.lower() == "exit":
-            exit()
-        print(query(user_prompt))
\ No newline at end of file
+    asyncio.run(repl())
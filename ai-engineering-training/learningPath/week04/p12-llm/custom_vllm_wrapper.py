@@ -4,8 +4,11 @@
 """
 from typing import Any, Dict, List, Optional, Union, Iterator
 from langchain_core.language_models.llms import LLM
-from langchain_core.callbacks.manager import CallbackManagerForLLMRun
-from pydantic import Field, validator
+from langchain_core.callbacks.manager import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.outputs import Generation, LLMResult
+from pydantic import ConfigDict, Field, PrivateAttr
+import asyncio
+import httpx
 import requests
 import json
 import time
@@ -17,6 +20,10 @@ class CustomVLLMWrapper(LLM):
     支持完整的模型参数配置和流式输出
     """
 
+    # 取值范围全部由 Field(ge=..., le=...) 声明，在 pydantic-core 中完成校验，
+    # 不再额外挂 Python 层的 @validator；构造后修改属性也不重复校验
+    model_config = ConfigDict(validate_assignment=False)
+
     # 基础配置
     model_name: str = Field(..., description="模型名称")
     base_url: str = Field(default="http://localhost:8000", description="vLLM 服务基础 URL")
@@ -59,24 +66,16 @@ class CustomVLLMWrapper(LLM):
     # 请求配置
     timeout: int = Field(default=60, description="请求超时时间(秒)")
     max_retries: int = Field(default=3, description="最大重试次数")
+    max_connections: int = Field(default=128, ge=1, description="异步连接池最大连接数")
 
-    @validator('temperature')
-    def validate_temperature(cls, v):
-        if v < 0 or v > 2:
-            raise ValueError('temperature 必须在 0-2 之间')
-        return v
-
-    @validator('top_p')
-    def validate_top_p(cls, v):
-        if v < 0 or v > 1:
-            raise ValueError('top_p 必须在 0-1 之间')
-        return v
+    # 异步 HTTP 客户端：首次异步调用时创建，之后所有并发请求共用同一个连接池
+    _async_client: Optional[httpx.AsyncClient] = PrivateAttr(default=None)
 
     @property
     def _llm_type(self) -> str:
         return "custom_vllm"
 
-    def __call(
+    def _call(
         self,
         prompt: str,
         stop: Optional[List[str]] = None,
@@ -95,3 +94,123 @@ class CustomVLLMWrapper(LLM):
 
         # 解析响应
         return self._parse_response(response)
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        """异步调用方法"""
+        params = self._build_request_params(prompt, stop or self.stop, **kwargs)
+        response = await self._amake_request(params)
+        return self._parse_response(response)
+
+    async def _agenerate(
+        self,
+        prompts: List[str],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> LLMResult:
+        """
+        批量异步生成
+
+        LLM 基类默认逐个 await 每个 prompt；这里改为同时发出全部请求，
+        让 vLLM 的连续批处理（continuous batching）一次处理多条请求，提高 GPU 利用率。
+        agenerate / abatch 都会走到这里。
+        """
+        texts = await asyncio.gather(
+            *(self._acall(prompt, stop=stop, run_manager=run_manager, **kwargs) for prompt in prompts)
+        )
+        return LLMResult(generations=[[Generation(text=text)] for text in texts])
+
+    def _build_request_params(self, prompt: str, stop: Optional[List[str]] = None, **kwargs: Any) -> Dict[str, Any]:
+        """构建 /v1/completions 请求参数"""
+        params = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "top_k": self.top_k,
+            "max_tokens": self.max_tokens,
+            "repetition_penalty": self.repetition_penalty,
+            "frequency_penalty": self.frequency_penalty,
+            "presence_penalty": self.presence_penalty,
+            "min_p": self.min_p,
+            "use_beam_search": self.use_beam_search,
+            "best_of": self.best_of,
+            "n": self.n,
+            "length_penalty": self.length_penalty,
+            "early_stopping": self.early_stopping,
+            "echo": self.echo,
+            "skip_special_tokens": self.skip_special_tokens,
+            "spaces_between_special_tokens": self.spaces_between_special_tokens,
+        }
+        # 可选参数：未设置时不发送，使用服务端默认值
+        optional = {
+            "stop": stop,
+            "stop_token_ids": self.stop_token_ids,
+            "seed": self.seed,
+            "logprobs": self.logprobs,
+        }
+        params.update({k: v for k, v in optional.items() if v is not None})
+        params.update(kwargs)
+        return params
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    def _make_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """发送同步请求，失败时按指数退避重试"""
+        url = f"{self.base_url.rstrip('/')}/v1/completions"
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = requests.post(url, json=params, headers=self._headers(), timeout=self.timeout)
+                response.raise_for_status()
+                return response.json()
+            except requests.RequestException:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(2 ** attempt)
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._headers(),
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+        return self._async_client
+
+    async def _amake_request(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """发送异步请求，失败时按指数退避重试"""
+        client = self._get_async_client()
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await client.post("/v1/completions", json=params)
+                response.raise_for_status()
+                return response.json()
+            except httpx.HTTPError:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+
+    def _parse_response(self, response: Dict[str, Any]) -> str:
+        """从响应中取出第一条生成文本"""
+        choices = response.get("choices") or []
+        if not choices:
+            raise ValueError(f"vLLM 响应中没有 choices: {response}")
+        return choices[0].get("text", "")
+
+    async def aclose(self):
+        """关闭异步连接池"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
@@ -3,6 +3,8 @@
 兼容当前版本，包含完整的错误处理和容错机制
 """
 
+import os
+
 from utils import logger
 from service import EnterpriseCustomerService
 
@@ -56,6 +58,15 @@ def demo_enterprise_application():
     for i, result in enumerate(batch_results, 1):
         print(f"结果 {i}: {result['category']} - {result['response']}...")
 
+    # 离线批量处理演示（Batch API，成本更低但结果异步返回）
+    if os.getenv("KEFU_USE_BATCH_API") == "1":
+        print(f"\n--- 离线批量处理演示（Batch API） ---")
+        batch_id = customer_service.submit_batch(test_cases)
+        print(f"已提交批量任务: {batch_id}")
+        offline_results = customer_service.wait_for_batch(batch_id)
+        for i, result in enumerate(offline_results, 1):
+            print(f"结果 {i}: {result['category']} - {result['response']}...")
+
     # 性能统计
     print(f"\n--- 性能统计 ---")
     stats = customer_service.get_performance_stats()
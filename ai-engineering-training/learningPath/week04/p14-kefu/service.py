@@ -1,27 +1,66 @@
-from utils import logger, retry_with_backoff, timeout_handler
+from utils import logger, retry_with_backoff, timeout_handler, async_retry_with_backoff, async_timeout_handler
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List
+import asyncio
 import json
+import os
+import re
 import time
 
-from langchain_core.runnables import Runnable, RunnableLambda, RunnableBranch
+from langchain_core.runnables import Runnable, RunnableLambda
 from langchain_core.output_parsers import BaseOutputParser
 from langchain_core.exceptions import OutputParserException
-from langchain_core.prompts import PromptTemplate
 from langchain_community.llms import Tongyi
 
+# JSON 解码器：每次响应都会经过的解析热路径，按 msgspec > orjson > 标准库 的顺序选用
+# 三者都接受 memoryview 切片（标准库需先转为 bytes），避免复制子串
+try:
+    import msgspec
+    _json_decode = msgspec.json.Decoder(dict).decode
+except ImportError:  # 可选依赖
+    try:
+        import orjson
+        _json_decode = orjson.loads
+    except ImportError:
+        def _json_decode(buf) -> Dict:
+            return json.loads(bytes(buf))
+
+# 路由关键词：所有类别的关键词合并为一个正则，一次扫描即可完成分类
+_ROUTE_KEYWORDS = {
+    "technical": ["bug", "错误", "故障", "技术", "API", "代码", "系统", "登录", "密码"],
+    "billing": ["账单", "费用", "付款", "充值", "退款", "价格", "订单"],
+}
+_KEYWORD_CATEGORY = {kw.lower(): category for category, keywords in _ROUTE_KEYWORDS.items() for kw in keywords}
+_KEYWORD_PATTERN = re.compile(
+    "|".join(re.escape(kw) for kw in sorted(_KEYWORD_CATEGORY, key=len, reverse=True)),
+    re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=4096)
+def _classify_text(question: str) -> str:
+    """一次扫描问题文本完成分类，技术问题优先于账单问题；评测等场景会反复出现相同问题，结果直接缓存"""
+    category = "general"
+    for m in _KEYWORD_PATTERN.finditer(question):
+        category = _KEYWORD_CATEGORY[m.group(0).lower()]
+        if category == "technical":
+            break
+    return category
+
 
 class CustomerServiceResponse(BaseOutputParser[Dict]):
     """客服响应解析器"""
 
     def parse(self, text: str) -> Dict:
         try:
-            # 尝试解析JSON格式
-            if '{' in text and '}' in text:
-                start = text.find('{')
-                end = text.rfind('}') + 1
-                json_str = text[start:end]
-                return json.loads(json_str)
+            # 尝试解析JSON格式：在 bytes 上定位花括号，用 memoryview 切片直接交给解码器
+            data = text.encode("utf-8")
+            start = data.find(b'{')
+            end = data.rfind(b'}') + 1
+            if start != -1 and end > 0:
+                return _json_decode(memoryview(data)[start:end])
 
             # 如果不是JSON，返回简单格式
             return {
@@ -60,75 +99,94 @@ class EnterpriseCustomerService:
 
     def setup_models(self):
         """设置模型"""
+        # 结构化输出：要求模型直接返回 JSON 对象，解析失败导致的备用模型调用（额外一次往返）随之减少
+        json_mode = {"response_format": {"type": "json_object"}}
+
         # 主要模型 - 高性能
         self.primary_model = Tongyi(
             model_name="qwen-max",
             temperature=0.3,
-            max_tokens=500
+            max_tokens=500,
+            model_kwargs=json_mode
         )
 
         # 备用模型 - 稳定性优先
         self.backup_model = Tongyi(
             model_name="qwen-plus",
             temperature=0.1,
-            max_tokens=300
+            max_tokens=300,
+            model_kwargs=json_mode
         )
 
     def setup_chains(self):
         """设置处理链"""
         self.parser = CustomerServiceResponse()
+        self.format_instructions = self.parser.get_format_instructions()
 
-        tech_prompt = PromptTemplate(
-            input_variables=["question", "user_info"],
-            template="""你是技术支持专家，请回答用户的技术问题。
+        # 技术问题处理链
+        tech_prompt = self._compile_prompt("""你是技术支持专家，请回答用户的技术问题。
 
                         用户信息：{user_info}
                         问题：{question}
 
                         {format_instructions}
 
-                        请提供专业的技术解答。""",
-            partial_variables={"format_instructions": self.parser.get_format_instructions()}
-        )
+                        请提供专业的技术解答。""")
 
         # 账单问题处理链
-        billing_prompt = PromptTemplate(
-            input_variables=["question", "user_info"],
-            template="""你是账单客服专员，请处理用户的账单相关问题。
+        billing_prompt = self._compile_prompt("""你是账单客服专员，请处理用户的账单相关问题。
 
                     用户信息：{user_info}
                     问题：{question}
 
                     {format_instructions}
 
-                    请提供准确的账单信息和解决方案。""",
-            partial_variables={"format_instructions": self.parser.get_format_instructions()}
-        )
+                    请提供准确的账单信息和解决方案。""")
 
         # 通用问题处理链
-        general_prompt = PromptTemplate(
-            input_variables=["question", "user_info"],
-            template="""你是客服代表，请友好地回答用户问题。
+        general_prompt = self._compile_prompt("""你是客服代表，请友好地回答用户问题。
 
                 用户信息：{user_info}
                 问题：{question}
 
                 {format_instructions}
 
-                请提供有帮助的回复。""",
-            partial_variables={"format_instructions": self.parser.get_format_instructions()}
-        )
+                请提供有帮助的回复。""")
 
         # 创建处理链
         self.tech_chain = tech_prompt | self.primary_model | self.parser
         self.billing_chain = billing_prompt | self.primary_model | self.parser
         self.general_chain = general_prompt | self.primary_model | self.parser
 
+    def _compile_prompt(self, template: str) -> Runnable:
+        """
+        初始化时把固定的格式说明代入模板，并按 {user_info}/{question} 切成 前缀/中段/后缀 三段常量；
+        调用时只做字符串拼接，不再解析模板、查找占位符
+        """
+        prefix, first_key, middle, second_key, suffix = re.split(r"\{(user_info|question)\}", template)
+        prefix, middle, suffix = (
+            part.replace("{format_instructions}", self.format_instructions)
+            for part in (prefix, middle, suffix)
+        )
+
+        def render(input_data: Dict) -> str:
+            return f"{prefix}{input_data[first_key]}{middle}{input_data[second_key]}{suffix}"
+
+        return RunnableLambda(render)
+
     def setup_fallback_system(self):
         """设置容错系统"""
 
         # 创建带有回退机制的处理函数
         def create_fallback_chain(primary_chain, chain_name):
+            backup_chain = primary_chain.first | self.backup_model | self.parser
+            busy_response = {
+                "response": "抱歉，系统暂时繁忙，请稍后重试或联系人工客服。",
+                "category": "system_error",
+                "confidence": 1.0,
+                "requires_human": True
+            }
+
             def fallback_processor(input_data):
                 try:
                     logger.info(f"使用主要链处理: {chain_name}")
@@ -137,44 +195,43 @@ class EnterpriseCustomerService:
                     logger.warning(f"{chain_name} 主链失败，尝试备用模型: {e}")
                     try:
                         # 第二层：备用模型处理
-                        backup_chain = primary_chain.first | self.backup_model | self.parser
                         return backup_chain.invoke(input_data)
                     except Exception as e2:
                         logger.error(f"{chain_name} 备用模型失败，使用简单响应: {e2}")
                         # 第三层：简单响应
-                        return {
-                            "response": "抱歉，系统暂时繁忙，请稍后重试或联系人工客服。",
-                            "category": "system_error",
-                            "confidence": 1.0,
-                            "requires_human": True
-                        }
+                        return dict(busy_response)
+
+            async def afallback_processor(input_data):
+                # 异步版本，供批量并发处理使用
+                try:
+                    logger.info(f"使用主要链处理: {chain_name}")
+                    return await primary_chain.ainvoke(input_data)
+                except Exception as e:
+                    logger.warning(f"{chain_name} 主链失败，尝试备用模型: {e}")
+                    try:
+                        return await backup_chain.ainvoke(input_data)
+                    except Exception as e2:
+                        logger.error(f"{chain_name} 备用模型失败，使用简单响应: {e2}")
+                        return dict(busy_response)
 
-            return RunnableLambda(fallback_processor)
+            return RunnableLambda(fallback_processor, afunc=afallback_processor)
 
         self.tech_chain_with_fallback = create_fallback_chain(self.tech_chain, "技术支持")
         self.billing_chain_with_fallback = create_fallback_chain(self.billing_chain, "账单服务")
         self.general_chain_with_fallback = create_fallback_chain(self.general_chain, "通用服务")
 
-        # 创建智能路由分支
-        self.smart_router = RunnableBranch(
-            (self._is_technical_question, self.tech_chain_with_fallback),
-            (self._is_billing_question, self.billing_chain_with_fallback),
-            self.general_chain_with_fallback  # 默认分支
-        )
-
-    @staticmethod
-    def _is_technical_question(x: Dict) -> bool:
-        """判断是否为技术问题"""
-        question = x.get("question", "").lower()
-        tech_keywords = ["bug", "错误", "故障", "技术", "API", "代码", "系统", "登录", "密码"]
-        return any(keyword in question for keyword in tech_keywords)
+        # 创建智能路由：先分类，再按类别查表分发（返回的链会被 RunnableLambda 继续调用）
+        self.chain_dispatch = {
+            "technical": self.tech_chain_with_fallback,
+            "billing": self.billing_chain_with_fallback,
+            "general": self.general_chain_with_fallback  # 默认分支
+        }
+        self.smart_router = RunnableLambda(lambda x: self.chain_dispatch[self._classify_question(x)])
 
     @staticmethod
-    def _is_billing_question(x: Dict) -> bool:
-        """判断是否为账单问题"""
-        question = x.get("question", "").lower()
-        billing_keywords = ["账单", "费用", "付款", "充值", "退款", "价格", "订单"]
-        return any(keyword in question for keyword in billing_keywords)
+    def _classify_question(x: Dict) -> str:
+        """判断问题类别（technical/billing/general）"""
+        return _classify_text(x.get("question", ""))
 
     @retry_with_backoff(max_attempts=3, base_delay=1.0)  # 重试机制
     @timeout_handler(timeout_seconds=30.0)  # 超时控制
@@ -182,49 +239,71 @@ class EnterpriseCustomerService:
         """带重试和超时的处理方法"""
         return self.smart_router.invoke(input_data)
 
+    @async_retry_with_backoff(max_attempts=3, base_delay=1.0)  # 重试机制（带抖动）
+    @async_timeout_handler(timeout_seconds=30.0)  # 超时控制
+    async def _aprocess_with_retry_and_timeout(self, input_data: Dict) -> Dict:
+        """带重试和超时的异步处理方法"""
+        return await self.smart_router.ainvoke(input_data)
+
+    def _begin_inquiry(self, question: str, user_info: Dict) -> Dict:
+        """记录请求并准备链的输入（同步/异步处理共用）"""
+        self.performance_stats["total_requests"] += 1
+        logger.info(f"处理客户咨询: {question[:50]}...")
+        return {
+            "question": question,
+            "user_info": json.dumps(user_info, ensure_ascii=False)
+        }
+
+    def _finish_inquiry(self, result: Dict, start_time: float) -> Dict:
+        """为成功的结果添加处理时间和状态，并更新性能统计"""
+        processing_time = round(time.time() - start_time, 2)
+        result["processing_time"] = processing_time
+        result["status"] = "success"
+
+        # 更新性能统计
+        self.performance_stats["successful_requests"] += 1
+        self._update_average_response_time(processing_time)
+
+        logger.info(f"处理完成，耗时: {processing_time}秒")
+        return result
+
+    def _fail_inquiry(self, error: Exception, start_time: float) -> Dict:
+        """记录失败并返回兜底的错误结果"""
+        processing_time = round(time.time() - start_time, 2)
+        self.performance_stats["failed_requests"] += 1
+
+        logger.error(f"处理失败: {error}")
+        return {
+            "response": "系统出现异常，请联系技术支持。",
+            "category": "system_error",
+            "confidence": 0.0,
+            "requires_human": True,
+            "status": "error",
+            "error": str(error),
+            "processing_time": processing_time
+        }
+
     def process_customer_inquiry(self, question: str, user_info: Dict) -> Dict:
         """处理客户咨询"""
         start_time = time.time()
-        self.performance_stats["total_requests"] += 1
-
         try:
-            logger.info(f"处理客户咨询: {question[:50]}...")
-
-            # 准备输入
-            input_data = {
-                "question": question,
-                "user_info": json.dumps(user_info, ensure_ascii=False)
-            }
-
+            input_data = self._begin_inquiry(question, user_info)
             # 执行带重试和超时的处理
             result = self._process_with_retry_and_timeout(input_data)
-
-            # 添加处理时间和状态
-            processing_time = round(time.time() - start_time, 2)
-            result["processing_time"] = processing_time
-            result["status"] = "success"
-
-            # 更新性能统计
-            self.performance_stats["successful_requests"] += 1
-            self._update_average_response_time(processing_time)
-
-            logger.info(f"处理完成，耗时: {processing_time}秒")
-            return result
-
+            return self._finish_inquiry(result, start_time)
         except Exception as e:
-            processing_time = round(time.time() - start_time, 2)
-            self.performance_stats["failed_requests"] += 1
+            return self._fail_inquiry(e, start_time)
 
-            logger.error(f"处理失败: {e}")
-            return {
-                "response": "系统出现异常，请联系技术支持。",
-                "category": "system_error",
-                "confidence": 0.0,
-                "requires_human": True,
-                "status": "error",
-                "error": str(e),
-                "processing_time": processing_time
-            }
+    async def aprocess_customer_inquiry(self, question: str, user_info: Dict) -> Dict:
+        """异步处理客户咨询（与 process_customer_inquiry 的统计、日志和错误结果一致）"""
+        start_time = time.time()
+        try:
+            input_data = self._begin_inquiry(question, user_info)
+            # 执行带重试和超时的处理
+            result = await self._aprocess_with_retry_and_timeout(input_data)
+            return self._finish_inquiry(result, start_time)
+        except Exception as e:
+            return self._fail_inquiry(e, start_time)
 
     def _update_average_response_time(self, new_time: float):
         """更新平均响应时间"""
@@ -235,20 +314,140 @@ class EnterpriseCustomerService:
         new_avg = ((current_avg * (total_successful - 1)) + new_time) / total_successful
         self.performance_stats["average_response_time"] = round(new_avg, 2)
 
-    def batch_process_inquiries(self, inquiries: List[Dict]) -> List[Dict]:
-        """批量处理客户咨询"""
-        logger.info(f"开始批量处理 {len(inquiries)} 个咨询")
+    async def abatch_process_inquiries(self, inquiries: List[Dict], max_concurrency: int = 16) -> List[Dict]:
+        """批量并发处理客户咨询，用信号量限制同时在途的请求数"""
+        logger.info(f"开始批量处理 {len(inquiries)} 个咨询，最大并发: {max_concurrency}")
 
-        results = []
-        for inquiry in inquiries:
-            result = self.process_customer_inquiry(
-                inquiry["question"],
-                inquiry.get("user_info", {})
-            )
-            results.append(result)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def worker(inquiry: Dict) -> Dict:
+            async with semaphore:
+                return await self.aprocess_customer_inquiry(
+                    inquiry["question"],
+                    inquiry.get("user_info", {})
+                )
+
+        # gather 按输入顺序返回结果
+        results = await asyncio.gather(*(worker(inquiry) for inquiry in inquiries))
 
         logger.info(f"批量处理完成")
-        return results
+        return list(results)
+
+    def batch_process_inquiries(self, inquiries: List[Dict], max_concurrency: int = 16) -> List[Dict]:
+        """
+        批量处理客户咨询（同步入口）
+
+        当前线程已有运行中的事件循环时（如 Jupyter Notebook、异步代码中调用），asyncio.run 会报错，
+        此时改为在单独的线程中运行；异步调用方应直接 await abatch_process_inquiries
+        """
+        coro = self.abatch_process_inquiries(inquiries, max_concurrency)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:  # 没有运行中的事件循环
+            return asyncio.run(coro)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coro).result()
+
+    def _get_batch_client(self):
+        """获取 Batch API 客户端（通义千问的 OpenAI 兼容接口），首次使用时才创建"""
+        if getattr(self, "_batch_client", None) is None:
+            from openai import OpenAI
+            self._batch_client = OpenAI(
+                api_key=os.getenv("DASHSCOPE_API_KEY"),
+                base_url=os.getenv("DASHSCOPE_COMPATIBLE_BASE", "https://dashscope.aliyuncs.com/compatible-mode/v1")
+            )
+        return self._batch_client
+
+    def _select_prompt(self, input_data: Dict) -> Runnable:
+        """按与 smart_router 相同的规则选择提示词模板"""
+        category = self._classify_question(input_data)
+        if category == "technical":
+            return self.tech_chain.first
+        if category == "billing":
+            return self.billing_chain.first
+        return self.general_chain.first
+
+    def submit_batch(self, inquiries: List[Dict], model: str = "qwen-max") -> str:
+        """
+        通过 Batch API 离线提交批量咨询（适合评测、夜间批处理等非交互场景）
+        费用约为实时调用的一半，代价是结果最长 24 小时内返回；返回 batch_id
+        """
+        lines = []
+        for i, inquiry in enumerate(inquiries):
+            input_data = {
+                "question": inquiry["question"],
+                "user_info": json.dumps(inquiry.get("user_info", {}), ensure_ascii=False)
+            }
+            prompt = self._select_prompt(input_data).invoke(input_data)
+            lines.append(json.dumps({
+                "custom_id": f"inquiry-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.3,
+                    "max_tokens": 500,
+                    "response_format": {"type": "json_object"}
+                }
+            }, ensure_ascii=False))
+
+        client = self._get_batch_client()
+        batch_file = client.files.create(
+            file=("inquiries.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"已提交批量任务 {batch.id}，共 {len(lines)} 个咨询")
+        return batch.id
+
+    def wait_for_batch(self, batch_id: str, poll_interval: float = 30.0) -> List[Dict]:
+        """轮询批量任务直到结束，按提交顺序返回解析后的结果"""
+        client = self._get_batch_client()
+        while True:
+            batch = client.batches.retrieve(batch_id)
+            if batch.status == "completed":
+                break
+            if batch.status in ("failed", "expired", "cancelled"):
+                raise RuntimeError(f"批量任务 {batch_id} 状态异常: {batch.status}")
+            logger.info(f"批量任务 {batch_id} 状态: {batch.status}，{poll_interval}秒后重试")
+            time.sleep(poll_interval)
+
+        results: Dict[int, Dict] = {}
+        if batch.output_file_id:
+            content = client.files.content(batch.output_file_id).text
+            for line in content.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                index = int(item["custom_id"].rsplit("-", 1)[1])
+                response = item.get("response") or {}
+                try:
+                    text = response["body"]["choices"][0]["message"]["content"]
+                    result = self.parser.parse(text)
+                    result["status"] = "success"
+                except Exception as e:
+                    result = self._batch_error(str(item.get("error") or e))
+                results[index] = result
+
+        # 未出现在输出文件中的请求（写入了 error_file）统一标记为失败
+        total = batch.request_counts.total if batch.request_counts else len(results)
+        return [results.get(i) or self._batch_error("批量任务未返回该请求的结果") for i in range(total)]
+
+    @staticmethod
+    def _batch_error(error: str) -> Dict:
+        return {
+            "response": "系统出现异常，请联系技术支持。",
+            "category": "system_error",
+            "confidence": 0.0,
+            "requires_human": True,
+            "status": "error",
+            "error": error
+        }
 
     def get_performance_stats(self) -> Dict:
         """获取性能统计"""
@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import random
 import time
 from functools import wraps
 
@@ -31,6 +33,30 @@ def retry_with_backoff(max_attempts=3, base_delay=1.0):
     return decorator
 
 
+def async_retry_with_backoff(max_attempts=3, base_delay=1.0):
+    """异步版本的重试装饰器，指数退避并加入随机抖动，避免并发请求同时重试（如遇到 429 限流）"""
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            for attempt in range(max_attempts):
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    if attempt == max_attempts - 1:
+                        logger.error(f"重试失败，已达到最大尝试次数: {e}")
+                        raise e
+
+                    delay = base_delay * (2 ** attempt) + random.uniform(0, base_delay)  # 指数退避 + 抖动
+                    logger.warning(f"第{attempt + 1}次尝试失败，{delay:.2f}秒后重试: {e}")
+                    await asyncio.sleep(delay)
+            return None
+
+        return wrapper
+
+    return decorator
+
+
 def timeout_handler(timeout_seconds=30.0):
     """超时控制装饰器"""
 
@@ -59,3 +85,20 @@ def timeout_handler(timeout_seconds=30.0):
         return wrapper
 
     return decorator
+
+
+def async_timeout_handler(timeout_seconds=30.0):
+    """异步超时控制装饰器（signal 只能在主线程使用，协程中改用 asyncio.wait_for）"""
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await asyncio.wait_for(func(*args, **kwargs), timeout=timeout_seconds)
+            except asyncio.TimeoutError:
+                logger.error(f"操作超时: {timeout_seconds}秒")
+                raise TimeoutError(f"操作超时 ({timeout_seconds}秒)")
+
+        return wrapper
+
+    return decorator
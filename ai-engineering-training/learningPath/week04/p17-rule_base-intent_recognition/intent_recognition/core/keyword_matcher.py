@@ -1,4 +1,89 @@
-from .models import IntentResult
+import sys
+
+from .models import IntentResult, UNKNOWN_RESULT
+
+try:
+    import ahocorasick  # pip install pyahocorasick，可选依赖
+except ImportError:
+    ahocorasick = None
+
+
+# 关键词权重配置（模块级常量）
+# - primary: 主关键词列表，直接表达意图的核心词汇
+# - secondary: 次关键词列表，间接相关的辅助词汇
+# - weights: 权重配置，定义不同级别关键词的得分
+KEYWORDS = {
+    # 查询订单意图的关键词配置
+    'query_order': {
+        'primary': ['查订单', '订单状态', '物流信息'],  # 直接表达查询意图
+        'secondary': ['快递', '发货', '到了吗'],  # 间接相关的查询词汇
+        'weights': {'primary': 0.8, 'secondary': 0.4}
+    },
+    # 退款意图的关键词配置
+    'refund': {
+        'primary': ['退钱', '退款', '退货'],  # 直接表达退款意图
+        'secondary': ['不要', '取消', '退回'],  # 间接表达不满意的词汇
+        'weights': {'primary': 0.8, 'secondary': 0.4}
+    },
+    # 开发票意图的关键词配置
+    'issue_invoice': {
+        'primary': ['开发票', '要发票', '发票'],  # 直接表达开票意图
+        'secondary': ['报销', '开票'],  # 相关的财务词汇
+        'weights': {'primary': 0.8, 'secondary': 0.4}
+    }
+}
+
+# 关键词条目表: 按 意图顺序 → 主/次关键词 → 列表顺序 编号，条目编号即在此元组中的下标
+# 每个条目为 (意图, 关键词, 权重)；编号越小越靠前，排序后即可还原原有的计分与输出顺序
+_KEYWORD_ENTRIES = tuple(
+    (intent, word, config['weights'][level])
+    for intent, config in KEYWORDS.items()
+    for level in ('primary', 'secondary')
+    for word in config[level]
+)
+
+
+def _build_word_index() -> dict:
+    """关键词 → 条目编号元组（同一个词可能出现在多个意图中）"""
+    index = {}
+    for entry_id, (_, word, _) in enumerate(_KEYWORD_ENTRIES):
+        index[word] = index.get(word, ()) + (entry_id,)
+    return index
+
+
+_WORD_ENTRY_IDS = _build_word_index()
+
+# 每个意图的规则标识 (keyword_{intent},)，预先生成并驻留，命中时直接复用
+_RULE_TAGS = {intent: (sys.intern(f"keyword_{intent}"),) for intent in KEYWORDS}
+
+
+def _build_automaton():
+    """用全部关键词构建 Aho-Corasick 自动机，值为条目编号；未安装 pyahocorasick 时返回 None"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word, entry_ids in _WORD_ENTRY_IDS.items():
+        automaton.add_word(word, entry_ids)
+    automaton.make_automaton()
+    return automaton
+
+
+_AUTOMATON = _build_automaton()
+
+
+def _find_entries(text: str) -> list:
+    """
+    找出文本中出现的所有关键词，返回按编号排序的条目编号列表
+
+    - 有 pyahocorasick 时: 自动机对文本只扫描一遍，同时命中所有(可重叠的)关键词
+    - 否则: 逐个做子串判断(C 层实现，关键词不多时同样足够快)
+    """
+    if _AUTOMATON is not None:
+        hits = {entry_id for _, entry_ids in _AUTOMATON.iter(text) for entry_id in entry_ids}
+    else:
+        hits = [entry_id for word, entry_ids in _WORD_ENTRY_IDS.items() if word in text
+                for entry_id in entry_ids]
+    return sorted(hits)
 
 
 class KeywordIntentParser:
@@ -37,26 +122,7 @@ class KeywordIntentParser:
         - 次关键词权重(0.4): 需要多个词组合才能确定意图
         - 总分上限(1.0): 避免过度累积导致的置信度失真
         """
-        self.keywords = {
-            # 查询订单意图的关键词配置
-            'query_order': {
-                'primary': ['查订单', '订单状态', '物流信息'],  # 直接表达查询意图
-                'secondary': ['快递', '发货', '到了吗'],  # 间接相关的查询词汇
-                'weights': {'primary': 0.8, 'secondary': 0.4}
-            },
-            # 退款意图的关键词配置
-            'refund': {
-                'primary': ['退钱', '退款', '退货'],  # 直接表达退款意图
-                'secondary': ['不要', '取消', '退回'],  # 间接表达不满意的词汇
-                'weights': {'primary': 0.8, 'secondary': 0.4}
-            },
-            # 开发票意图的关键词配置
-            'issue_invoice': {
-                'primary': ['开发票', '要发票', '发票'],  # 直接表达开票意图
-                'secondary': ['报销', '开票'],  # 相关的财务词汇
-                'weights': {'primary': 0.8, 'secondary': 0.4}
-            }
-        }
+        self.keywords = KEYWORDS
 
     def parse(self, text: str) -> IntentResult:
         """
@@ -69,37 +135,29 @@ class KeywordIntentParser:
             IntentResult: 包含意图、置信度、匹配词汇等信息的结果对象
 
         算法流程:
-            1. 遍历所有意图类型
-            2. 对每个意图计算关键词匹配得分
-            3. 累积主关键词和次关键词的权重得分
+            1. 一次扫描找出文本中出现的关键词条目
+            2. 只对命中的条目，按所属意图累积得分
+            3. 主关键词和次关键词分别按各自权重计分
             4. 选择得分最高的意图作为最终结果
             5. 如果没有任何匹配，返回未知意图
             """
         scores = {}  # 存储每个意图的得分信息
 
-        # 遍历所有意图类型及其关键词配置
-        for intent, config in self.keywords.items():
-            score = 0  # 当前意图的累积得分
-            matched_words = []  # 匹配到的关键词列表
-
-            # 计算主关键词得分
-            for word in config['primary']:
-                if word in text:  # 简单的字符串包含匹配
-                    score += config['weights']['primary']  # 累加主关键词权重
-                    matched_words.append(word)  # 记录匹配的词汇
-
-            # 计算次关键词得分
-            for word in config['secondary']:
-                if word in text:  # 简单的字符串包含匹配
-                    score += config['weights']['secondary']  # 累加次关键词权重
-                    matched_words.append(word)  # 记录匹配的词汇
-
-            # 如果有匹配的关键词，记录该意图的得分信息
-            if score > 0:
-                scores[intent] = {
-                    'score': min(score, 1.0),  # 得分上限截断为1.0
-                    'matched_words': matched_words  # 保存匹配的词汇列表
-                }
+        # 一次扫描找出文本中出现的全部关键词条目，之后只对命中的条目计分
+        hits = _find_entries(text)
+        if not hits:
+            return UNKNOWN_RESULT
+
+        # 条目已按编号排序: 同一意图的条目相邻，且意图、主/次关键词的先后与配置一致
+        for entry_id in hits:
+            intent, word, weight = _KEYWORD_ENTRIES[entry_id]
+            if intent not in scores:
+                scores[intent] = {'score': 0, 'matched_words': []}
+            scores[intent]['score'] += weight  # 累加对应级别的权重
+            scores[intent]['matched_words'].append(word)  # 记录匹配的词汇
+
+        for intent_scores in scores.values():
+            intent_scores['score'] = min(intent_scores['score'], 1.0)  # 得分上限截断为1.0
 
         # 如果有得分的意图，选择得分最高的作为结果
         if scores:
@@ -108,10 +166,11 @@ class KeywordIntentParser:
             return IntentResult(
                 intent=best_intent,  # 最佳意图
                 confidence=scores[best_intent]['score'],  # 对应的置信度得分
-                matched_rules=[f"keyword_{best_intent}"],  # 匹配规则标识
-                extracted_entities=tuple(scores[best_intent]['matched_words'])  # 匹配的关键词
+                matched_rules=_RULE_TAGS[best_intent],  # 匹配规则标识
+                extracted_entities=tuple(scores[best_intent]['matched_words']),  # 匹配的关键词
+                source="keyword"  # 结果来源
             )
 
         # 没有任何关键词匹配，返回默认的未知意图结果
-        return IntentResult()
+        return UNKNOWN_RESULT
 
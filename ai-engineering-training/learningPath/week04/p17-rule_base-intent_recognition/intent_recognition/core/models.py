@@ -1,7 +1,7 @@
-from typing import List, Optional
+from typing import Optional, Tuple
 from dataclasses import dataclass
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class IntentResult:
     """
     意图识别结果数据类
@@ -10,15 +10,20 @@ class IntentResult:
     用于封装单个解析器的识别结果，包含以下信息:
     - intent: 识别出的意图类型 (如 'query_order', 'refund' 等)
     - confidence: 置信度分数 (0.0-1.0)
-    - matched_rules: 匹配的规则列表 (用于可解释性)
+    - matched_rules: 匹配的规则元组 (用于可解释性)
     - extracted_entities: 提取的实体信息 (如订单号、时间等)
+    - source: 产生该结果的解析器 ("regex" / "keyword")，融合时直接比较，无需扫描规则字符串
+    - slots: 解析时顺带提取的槽位 ((槽位名, 值), ...)，用元组保持结果可哈希
+
+    slots=True 省去实例 __dict__，frozen=True 保证结果创建后不可变、可哈希
     """
     intent: str = "unknown"                    # 默认为未知意图
     confidence: float = 0.0                    # 默认置信度为0
-    matched_rules: List[str] = None            # 匹配的规则列表
+    matched_rules: Tuple[str, ...] = ()        # 匹配的规则元组
     extracted_entities: Optional[tuple] = None # 提取的实体元组
+    source: str = ""                           # 结果来源解析器
+    slots: Tuple[Tuple[str, str], ...] = ()    # 已提取的槽位
+
 
-    def __post_init__(self):
-        """数据类初始化后处理，确保 matched_rules 不为 None"""
-        if self.matched_rules is None:
-            self.matched_rules = []
\ No newline at end of file
+# 未知意图的共享实例: IntentResult 不可变，未命中时直接返回它，不必每次新建
+UNKNOWN_RESULT = IntentResult()
@@ -1,6 +1,75 @@
 import re
+import sys
+
+from .models import IntentResult, UNKNOWN_RESULT
+
+# 正则模式字典（模块级常量）
+# 模式设计原则:
+# 1. 中间间隔用非贪婪的 .*? 而不是 .*，避免先吞到行尾再逐字回溯
+# 2. 结束符是单个字符时用否定字符类，如 [^款\n]*款，一路扫到第一个结束符，没有回溯
+#    (排除 \n 与 . 的含义保持一致，匹配结果与原先的 .* 写法相同)
+# 3. 使用 (\d+) 捕获数字信息，前面用 [^\d\n]* 直接跳到第一个数字
+# 4. 按匹配精确度排序，精确的模式放在前面
+# 5. 捕获组能直接确定槽位时使用命名分组 (?P<槽位名>...)，命中后直接作为槽位，省去再次匹配
+INTENT_PATTERNS = {
+    # 查询订单相关模式
+    'query_order': [
+        r'查.*?订单[^\d\n]*(\d+)',  # 匹配: "查订单123" -> 提取订单后的第一个数字串
+        r'订单号.*?(?P<order_id>\d{6,})',  # 匹配: "订单号123456" -> 提取6位以上数字作为订单号
+        r'我的订单.*?状态'  # 匹配: "我的订单状态" -> 无提取
+    ],
+    # 退款相关模式
+    'refund': [
+        r'退[^款\n]*款',  # 匹配: "退款"、"申请退款"
+        r'取消.*?订单',  # 匹配: "取消订单"、"取消这个订单"
+        r'不要[^了\n]*了'  # 匹配: "不要了"、"我不要这个了"
+    ],
+    # 开发票相关模式
+    'issue_invoice': [
+        r'开.*?发票',  # 匹配: "开发票"、"帮我开个发票"
+        r'要.*?发票',  # 匹配: "要发票"、"我要发票"
+        r'发票[^开\n]*开'  # 匹配: "发票怎么开"
+    ]
+}
+
+
+def _build_combined_pattern():
+    r"""
+    把所有意图的模式融合成一个正则，一次匹配完成全部判断
+
+    每个模式包成 (?=[\s\S]*?(?P<intent__i>模式)) 的前瞻分支，整体从文本开头匹配:
+    - 分支按 意图顺序 → 模式顺序 依次尝试，第一个成功的分支胜出，与逐条 search 的优先级完全一致
+    - 前瞻内的 [\s\S]*? 等价于 search 在任意位置找最左匹配
+    - 分组名 intent__i 标识命中的规则，原模式内部的捕获组仍按编号保留
+    - 原模式中的槽位命名分组改名为 intent__i__槽位名，避免不同分支间重名
+
+    Returns:
+        (编译后的正则, {分组名: (意图, 规则标识元组, 内部捕获组起始下标, 内部捕获组个数, ((槽位名, 分组下标), ...))})
+    """
+    branches = []
+    group_info = {}
+    group_count = 0
+    for intent, patterns in INTENT_PATTERNS.items():
+        for i, pattern in enumerate(patterns):
+            name = f"{intent}__{i}"
+            inner = re.compile(pattern)
+            # 外层命名分组占一个编号，内部捕获组紧随其后
+            slot_groups = tuple((slot_name, group_count + 1 + index)
+                                for slot_name, index in inner.groupindex.items())
+            # 规则标识 regex_{intent}_{i} 在这里生成一次并驻留，命中时直接复用，不再每次格式化
+            matched_rules = (sys.intern(f"regex_{intent}_{i}"),)
+            group_info[name] = (intent, matched_rules, group_count + 1, inner.groups, slot_groups)
+            group_count += 1 + inner.groups
+            pattern = re.sub(r"\(\?P<(\w+)>", rf"(?P<{name}__\1>", pattern)
+            branches.append(f"(?=[\\s\\S]*?(?P<{name}>{pattern}))")
+    return re.compile("|".join(branches), re.IGNORECASE), group_info
+
+
+# 导入时一次性编译（忽略大小写），所有解析器实例共用
+# 注意: 融合正则依赖前瞻 (?=...) 来保持规则优先级，RE2 不支持前瞻，因此这里固定使用标准库 re
+_COMBINED_PATTERN, _GROUP_INFO = _build_combined_pattern()
+
 
-from .models import IntentResult
 class RegexIntentParser:
     """
     正则表达式意图解析器
@@ -22,32 +91,9 @@ class RegexIntentParser:
         """
         初始化正则模式字典
 
-        模式设计原则:
-        1. 使用 .* 匹配任意字符，增加灵活性
-        2. 使用 (\d+) 捕获数字信息
-        3. 使用 .*? 进行非贪婪匹配
-        4. 按匹配精确度排序，精确的模式放在前面
+        直接引用模块级配置与预编译好的融合正则，创建实例不再重复编译
         """
-        self.patterns = {
-            # 查询订单相关模式
-            'query_order': [
-                r'查.*订单.*(\d+)',  # 匹配: "查订单123" -> 提取数字
-                r'订单号.*?(\d{6,})',  # 匹配: "订单号123456" -> 提取6位以上数字
-                r'我的订单.*状态'  # 匹配: "我的订单状态" -> 无提取
-            ],
-            # 退款相关模式
-            'refund': [
-                r'退.*款',  # 匹配: "退款"、"申请退款"
-                r'取消.*订单',  # 匹配: "取消订单"、"取消这个订单"
-                r'不要.*了'  # 匹配: "不要了"、"我不要这个了"
-            ],
-            # 开发票相关模式
-            'issue_invoice': [
-                r'开.*发票',  # 匹配: "开发票"、"帮我开个发票"
-                r'要.*发票',  # 匹配: "要发票"、"我要发票"
-                r'发票.*开'  # 匹配: "发票怎么开"
-            ]
-        }
+        self.patterns = INTENT_PATTERNS
 
     def parse(self, text: str) -> IntentResult:
         """
@@ -60,26 +106,27 @@ class RegexIntentParser:
             IntentResult: 包含意图、置信度、匹配规则等信息的结果对象
 
         处理流程:
-            1. 遍历所有意图类型
-            2. 对每个意图的所有模式进行匹配
-            3. 找到第一个匹配的模式就立即返回(优先级机制)
+            1. 用融合正则对文本做一次匹配(分支顺序即优先级)
+            2. 根据命中的分组名找回意图类型和规则标识
+            3. 取出该规则内部捕获组的内容作为提取实体，命名分组的内容作为槽位
             4. 如果没有匹配，返回默认的未知意图结果
         """
-        # 遍历所有意图类型和对应的正则模式
-        for intent, patterns in self.patterns.items():
-            # 遍历当前意图的所有正则模式
-            for i, pattern in enumerate(patterns):
-                # 执行正则匹配，忽略大小写
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    # 匹配成功，构造并返回结果
-                    return IntentResult(
-                        intent=intent,  # 意图类型
-                        confidence=0.9,  # 正则匹配的高置信度
-                        matched_rules=[f"regex_{intent}_{i}"],  # 匹配规则标识
-                        extracted_entities=match.groups() if match.groups() else None  # 提取的实体
-                    )
+        match = _COMBINED_PATTERN.match(text)
+        if match:
+            # 外层命名分组最后闭合，lastgroup 即命中的规则
+            intent, matched_rules, start, count, slot_groups = _GROUP_INFO[match.lastgroup]
+            entities = match.groups()[start:start + count]
+            slots = tuple((slot_name, match.group(index)) for slot_name, index in slot_groups
+                          if match.group(index) is not None)
+            return IntentResult(
+                intent=intent,  # 意图类型
+                confidence=0.9,  # 正则匹配的高置信度
+                matched_rules=matched_rules,  # 匹配规则标识
+                extracted_entities=entities if entities else None,  # 提取的实体
+                source="regex",  # 结果来源
+                slots=slots  # 匹配时顺带得到的槽位
+            )
 
         # 没有任何模式匹配，返回默认结果
-        return IntentResult()
+        return UNKNOWN_RESULT
 
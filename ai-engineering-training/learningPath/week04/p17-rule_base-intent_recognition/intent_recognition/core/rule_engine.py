@@ -1,10 +1,15 @@
-from typing import Dict, Any, List
+import logging
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
 
-from .models import IntentResult
+from .models import IntentResult, UNKNOWN_RESULT
 from .regex_matcher import RegexIntentParser
 from .keyword_matcher import KeywordIntentParser
 from .slot_filler import (SlotExtractor)
 
+logger = logging.getLogger(__name__)
+
+
 class RuleBasedIntentChain:
     """
     LangChain 风格的意图识别主链
@@ -23,7 +28,7 @@ class RuleBasedIntentChain:
     4. 可解释性: 提供详细的推理过程
 
     工作流程:
-    输入文本 → 并行解析 → 结果融合 → 槽位提取 → 推理解释 → 输出结果
+    输入文本 → 正则解析 →(未命中时)关键词解析 → 结果融合 → 槽位提取 → 推理解释 → 输出结果
     """
 
     def __init__(self):
@@ -43,6 +48,8 @@ class RuleBasedIntentChain:
         self.regex_parser = RegexIntentParser()  # 正则表达式意图解析器
         self.keyword_parser = KeywordIntentParser()  # 关键词权重意图解析器
         self.slot_extractor = SlotExtractor()  # 槽位信息提取器
+        # 识别结果缓存: 整个流程只取决于输入文本，重复的话术(如"查订单")直接命中缓存
+        self._recognize = lru_cache(maxsize=4096)(self._recognize_text)
 
     def invoke(self, input_dict: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -64,44 +71,65 @@ class RuleBasedIntentChain:
 
         处理流程详解:
         1. 输入验证: 从输入字典中提取文本
-        2. 并行解析: 同时运行正则和关键词解析器
-        3. 结果融合: 根据策略选择最佳识别结果
+        2. 正则解析: 高置信度命中时直接采用，不再运行关键词解析器
+        3. 结果融合: 否则运行关键词解析器，根据策略选择最佳识别结果
         4. 槽位提取: 基于意图类型提取相关参数
         5. 推理生成: 生成可解释的推理过程
         6. 结果封装: 将所有信息整合为输出字典
+
+        步骤2-5 只取决于文本，结果按文本做 LRU 缓存(最多 4096 条)
         """
         # 步骤1: 提取输入文本，提供默认值避免KeyError
         text = input_dict.get("text", "")
 
-        # 步骤2: 并行执行多个解析器
-        # 注意: 这里是"并行"的概念，实际是顺序执行，但逻辑上独立
+        # 步骤2-5: 识别意图、提取槽位、生成推理说明（相同文本直接取缓存）
+        final_result, slots, reasoning = self._recognize(text)
+
+        # 步骤6: 构造并返回完整的结果字典（每次新建，调用方修改不会影响缓存）
+        return {
+            "intent": final_result.intent,  # 最终识别的意图
+            "confidence": final_result.confidence,  # 置信度分数
+            "slots": dict(slots),  # 提取的槽位参数
+            "matched_rules": final_result.matched_rules,  # 匹配的规则标识
+            "extracted_entities": final_result.extracted_entities,  # 提取的实体
+            "reasoning": reasoning  # 推理过程说明
+        }
+
+    def _recognize_text(self, text: str) -> Tuple[IntentResult, Tuple[Tuple[str, str], ...], str]:
+        """
+        对单条文本执行识别流程，返回不可变的结果，供 lru_cache 缓存
+
+        Returns:
+            (最终识别结果, 槽位 ((槽位名, 值), ...), 推理说明)
+        """
+        # 步骤2: 先执行正则解析
         regex_result = self.regex_parser.parse(text)  # 正则匹配解析
-        keyword_result = self.keyword_parser.parse(text)  # 关键词匹配解析
 
-        print(f"[Debug] Regex Result: {regex_result}")
-        print(f"[Debug] Keyword Result: {keyword_result}")
+        # 调试信息走 logging，未开启 DEBUG 级别时不做任何格式化和输出
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Regex Result: %s", regex_result)
 
-        # 步骤3: 融合多个解析器的结果
-        # 使用智能策略选择最佳结果
-        final_result = self._merge_results([regex_result, keyword_result])
+        if regex_result.intent != "unknown" and regex_result.confidence > 0.8:
+            # 正则高置信度命中时融合结果必然是它，跳过关键词解析
+            final_result = regex_result
+        else:
+            # 步骤3: 正则未命中时再执行关键词解析，并融合两者的结果
+            keyword_result = self.keyword_parser.parse(text)  # 关键词匹配解析
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Keyword Result: %s", keyword_result)
+            final_result = self._merge_results([regex_result, keyword_result])
 
-        print(f"[Debug] Final Merged Result: {final_result}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Final Merged Result: %s", final_result)
 
         # 步骤4: 基于最终意图提取槽位信息
-        slots = self.slot_extractor.extract_slots(text, final_result.intent)
+        # 意图正则已提取的槽位直接复用，只对剩余槽位做匹配
+        slots = self.slot_extractor.extract_slots(text, final_result.intent, dict(final_result.slots))
 
         # 步骤5: 生成人类可读的推理解释
         reasoning = self._generate_reasoning(final_result)
 
-        # 步骤6: 构造并返回完整的结果字典
-        return {
-            "intent": final_result.intent,  # 最终识别的意图
-            "confidence": final_result.confidence,  # 置信度分数
-            "slots": slots,  # 提取的槽位参数
-            "matched_rules": final_result.matched_rules,  # 匹配的规则标识
-            "extracted_entities": final_result.extracted_entities,  # 提取的实体
-            "reasoning": reasoning  # 推理过程说明
-        }
+        return final_result, tuple(slots.items()), reasoning
 
     def _merge_results(self, results: List[IntentResult]) -> IntentResult:
         """
@@ -116,6 +144,7 @@ class RuleBasedIntentChain:
         融合策略说明:
         1. 优先级策略: 正则匹配 > 关键词匹配
         2. 置信度阈值: 正则匹配置信度 > 0.8 时直接采用
+           (invoke 中已提前处理该情况，此时不会再调用本方法；这里保留以便单独使用)
         3. 最优选择: 其他情况选择置信度最高的结果
         4. 兜底机制: 无有效结果时返回未知意图
 
@@ -131,12 +160,11 @@ class RuleBasedIntentChain:
 
         # 步骤2: 如果没有有效结果，返回默认的未知意图
         if not valid_results:
-            return IntentResult()
+            return UNKNOWN_RESULT
 
         # 步骤3: 正则匹配优先策略
         # 如果正则匹配的置信度足够高(>0.8)，直接采用
-        regex_results = [r for r in valid_results
-                         if any("regex" in rule for rule in r.matched_rules)]
+        regex_results = [r for r in valid_results if r.source == "regex"]
         if regex_results and regex_results[0].confidence > 0.8:
             return regex_results[0]
 
@@ -166,13 +194,26 @@ class RuleBasedIntentChain:
         - 识别的意图类型
         - 对应的置信度分数
         """
+        # 结果按输入文本缓存（见 _recognize_text），同一文本的说明只格式化一次；
+        # 返回普通字符串，结果字典可以直接 json.dumps
+
         # 处理未知意图的情况
         if result.intent == "unknown":
             return "未匹配到任何规则"
 
         # 判断使用的识别方法
-        rule_type = ("正则匹配" if any("regex" in rule for rule in result.matched_rules)
-                     else "关键词匹配")
+        rule_type = "正则匹配" if result.source == "regex" else "关键词匹配"
 
         # 生成格式化的推理说明
         return f"通过{rule_type}识别为{result.intent}，置信度{result.confidence:.2f}"
+
+
+@lru_cache(maxsize=1)
+def get_intent_chain() -> RuleBasedIntentChain:
+    """
+    获取进程内共享的意图识别链
+
+    各解析器的正则、关键词在模块导入时就已编译好，链本身也无每次请求的状态，
+    因此整个进程只需一个实例；脚本、Web 接口等调用方都应通过这里获取，而不是每次新建
+    """
+    return RuleBasedIntentChain()
@@ -1,5 +1,40 @@
-import re
-from typing import Dict
+from typing import Dict, Optional
+
+try:
+    # RE2 (pip install google-re2): 基于自动机，线性时间匹配，没有回溯；槽位模式都是 RE2 支持的语法
+    import re2 as _re
+except ImportError:
+    import re as _re
+
+
+# 槽位提取模式配置（模块级常量）
+# - 外层key: 意图类型 (如 'query_order')
+# - 内层key: 槽位名称 (如 'order_id')
+# - 内层value: 正则表达式模式 (用于提取对应信息)
+SLOT_PATTERNS = {
+    # 查询订单意图的槽位配置
+    'query_order': {
+        'order_id': r'(\d{6,})',  # 提取6位以上数字作为订单号
+        'time': r'(昨天|今天|前天|上周|本月)'  # 提取时间表达
+    },
+    # 退款意图的槽位配置
+    'refund': {
+        'order_id': r'订单.*?(\d{6,})',  # 在"订单"关键词后提取数字
+        'reason': r'因为(.*?)所以',  # 提取"因为...所以"中的原因
+        'time': r'(昨天|今天|前天)[^下\n]*下.*?单'  # 提取下单时间表达
+    },
+    # 开发票意图的槽位配置
+    'issue_invoice': {
+        'order_id': r'(\d{6,})',  # 提取订单号
+        'amount': r'(\d+\.?\d*)元'  # 提取金额数字(支持小数)
+    }
+}
+
+# 导入时一次性编译，所有提取器实例共用
+_COMPILED_SLOT_PATTERNS = {
+    intent: {slot_name: _re.compile(pattern) for slot_name, pattern in patterns.items()}
+    for intent, patterns in SLOT_PATTERNS.items()
+}
 
 
 class SlotExtractor:
@@ -27,42 +62,23 @@ class SlotExtractor:
         """
         初始化槽位提取模式配置
 
-        配置结构说明:
-        - 外层key: 意图类型 (如 'query_order')
-        - 内层key: 槽位名称 (如 'order_id')
-        - 内层value: 正则表达式模式 (用于提取对应信息)
+        直接引用模块级预编译好的模式（见 SLOT_PATTERNS），创建实例不再重复编译
 
         正则模式设计要点:
         - 使用捕获组 () 提取目标信息
         - 考虑中文表达的多样性
         - 平衡精确度和召回率
         """
-        self.slot_patterns = {
-            # 查询订单意图的槽位配置
-            'query_order': {
-                'order_id': r'(\d{6,})',  # 提取6位以上数字作为订单号
-                'time': r'(昨天|今天|前天|上周|本月)'  # 提取时间表达
-            },
-            # 退款意图的槽位配置
-            'refund': {
-                'order_id': r'订单.*?(\d{6,})',  # 在"订单"关键词后提取数字
-                'reason': r'因为(.*?)所以',  # 提取"因为...所以"中的原因
-                'time': r'(昨天|今天|前天).*下.*单'  # 提取下单时间表达
-            },
-            # 开发票意图的槽位配置
-            'issue_invoice': {
-                'order_id': r'(\d{6,})',  # 提取订单号
-                'amount': r'(\d+\.?\d*)元'  # 提取金额数字(支持小数)
-            }
-        }
-
-    def extract_slots(self, text: str, intent: str) -> Dict[str, str]:
+        self.slot_patterns = _COMPILED_SLOT_PATTERNS
+
+    def extract_slots(self, text: str, intent: str, known_slots: Optional[Dict[str, str]] = None) -> Dict[str, str]:
         """
         根据意图类型提取槽位信息
 
         Args:
             text: 用户输入的原始文本
             intent: 已识别的意图类型
+            known_slots: 意图解析时已经得到的槽位，这些槽位不再重复匹配
 
         Returns:
             Dict[str, str]: 槽位名称到提取值的映射字典
@@ -80,6 +96,7 @@ class SlotExtractor:
         - 只提取正则捕获组中的内容 (match.group(1))
         """
         slots = {}  # 初始化槽位结果字典
+        known_slots = known_slots or {}
 
         # 检查当前意图是否有对应的槽位配置
         if intent in self.slot_patterns:
@@ -87,8 +104,12 @@ class SlotExtractor:
 
             # 遍历所有槽位，尝试提取信息
             for slot_name, pattern in patterns.items():
+                if slot_name in known_slots:
+                    # 意图正则已经提取过，直接复用
+                    slots[slot_name] = known_slots[slot_name]
+                    continue
                 # 执行正则匹配
-                match = re.search(pattern, text)
+                match = pattern.search(text)
                 if match:
                     # 匹配成功，提取捕获组的内容
                     slots[slot_name] = match.group(1)
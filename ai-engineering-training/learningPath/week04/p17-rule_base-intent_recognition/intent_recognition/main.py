@@ -1,4 +1,4 @@
-from core.rule_engine import RuleBasedIntentChain
+from core.rule_engine import get_intent_chain
 
 
 def main():
@@ -27,8 +27,8 @@ def main():
     """
     print("=== LangChain 风格的基于规则意图识别系统 (完整注释版) ===\n")
 
-    # 创建意图识别链实例
-    intent_chain = RuleBasedIntentChain()
+    # 获取共享的意图识别链实例
+    intent_chain = get_intent_chain()
 
     # 设计多样化的测试用例
     test_cases = [
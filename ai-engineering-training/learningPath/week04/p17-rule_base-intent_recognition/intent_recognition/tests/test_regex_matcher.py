@@ -0,0 +1,57 @@
+"""正则意图解析器测试: 收紧后的模式与原先的 .* 写法匹配同样的输入"""
+
+import re
+
+import pytest
+
+from core.regex_matcher import INTENT_PATTERNS, RegexIntentParser
+
+# 收紧前的原始模式（按意图、按优先级排列），作为匹配结果的对照
+OLD_PATTERNS = {
+    'query_order': [r'查.*订单.*(\d+)', r'订单号.*?(?P<order_id>\d{6,})', r'我的订单.*状态'],
+    'refund': [r'退.*款', r'取消.*订单', r'不要.*了'],
+    'issue_invoice': [r'开.*发票', r'要.*发票', r'发票.*开'],
+}
+
+CORPUS = [
+    "查订单123", "帮我查一下订单 123456", "查询订单号987654321", "订单号123456", "订单号12345",
+    "我的订单现在什么状态", "我的订单\n状态", "查\n订单123",
+    "退款", "申请退款", "我想退个款", "退\n款", "取消订单", "取消这个订单", "不要了", "我不要这个了",
+    "开发票", "帮我开个发票", "要发票", "我要发票", "发票怎么开", "发票\n开",
+    "今天天气怎么样", "", "订单", "款退", "了不要", "ORDER 123",
+]
+
+
+def _first_match(patterns, text):
+    """按意图 → 模式的顺序找第一个命中的规则，返回 (意图, 模式下标)"""
+    for intent, intent_patterns in patterns.items():
+        for i, pattern in enumerate(intent_patterns):
+            if re.search(pattern, text, re.IGNORECASE):
+                return intent, i
+    return None
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_same_inputs_match(text):
+    """每条输入命中的意图和规则与原始模式一致"""
+    assert _first_match(INTENT_PATTERNS, text) == _first_match(OLD_PATTERNS, text)
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_parser_uses_pattern_priority(text):
+    """融合正则解析的结果与逐条匹配的优先级一致"""
+    expected = _first_match(OLD_PATTERNS, text)
+    result = RegexIntentParser().parse(text)
+    if expected is None:
+        assert result.intent == "unknown"
+    else:
+        intent, i = expected
+        assert result.intent == intent
+        assert result.matched_rules == (f"regex_{intent}_{i}",)
+
+
+def test_query_order_captures_full_number():
+    """订单后的数字整体捕获（原先的贪婪写法只能捕获到最后一位）"""
+    result = RegexIntentParser().parse("帮我查一下订单 123456")
+    assert result.extracted_entities == ("123456",)
+    assert re.search(OLD_PATTERNS['query_order'][0], "帮我查一下订单 123456").group(1) == "6"
@@ -4,7 +4,8 @@ from langchain_core.runnables import RunnablePassthrough, RunnableLambda
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_community.llms.tongyi import Tongyi
 
-from typing import List, Dict, Any
+from itertools import islice
+from typing import Iterable, List, Dict, Any
 
 from dotenv import load_dotenv
 
@@ -47,7 +48,7 @@ class ChatChain:
                 | self.paser
         )
 
-    async def process_message(self, message: str, history: List[Dict] = None) -> str:
+    async def process_message(self, message: str, history: Iterable[Dict] = None) -> str:
         """处理用户消息"""
         try:
             # 准备输入数据
@@ -70,8 +71,8 @@ class ChatChain:
             return []
         messages = []
 
-        # 只保留最近5轮对话
-        recent_history = history[-5:] if len(history) > 5 else history
+        # 只保留最近5轮对话（history 可能是 deque，不支持切片，用 islice 跳过前面的部分）
+        recent_history = islice(history, max(len(history) - 5, 0), None)
         for item in recent_history:
             messages.append(HumanMessage(content=item["user_message"]))
             messages.append(AIMessage(content=item["bot_reply"]))
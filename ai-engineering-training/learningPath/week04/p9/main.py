@@ -62,7 +62,7 @@ async def clear_session(session_id: str):
 @app.get("/session/{session_id}/history")
 async def get_session_history(session_id: str):
     """获取会话历史"""
-    history = session_manager.get_history(session_id)
+    history = session_manager.export_history(session_id)
     return {"session_id": session_id, "history": history}
 
 if __name__ == "__main__":
@@ -1,19 +1,31 @@
-from typing import List, Dict
+from typing import Deque, Dict, List, Tuple
+import heapq
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
 from datetime import datetime
 
 
 class SessionManager:
     def __init__(self, max_history_length: int = 10):
-        self.sessions: Dict[str, List[Dict]] = defaultdict(list)
         self.max_history_length = max_history_length
+        # 每个会话的历史用定长 deque 保存：超过上限时自动丢弃最旧的一条，O(1) 且无需复制列表
+        self.sessions: Dict[str, Deque[Dict]] = defaultdict(lambda: deque(maxlen=self.max_history_length))
         self.last_activity: Dict[str, float] = {}
+        # 按活跃时间排序的小顶堆 (活跃时间, session_id)，清理时只需从堆顶弹出过期项
+        # 会话每次活跃都会压入新记录，旧记录不删除，弹出时与 last_activity 比对后忽略（惰性删除）
+        self._activity_heap: List[Tuple[float, str]] = []
 
-    def get_history(self, session_id: str) -> List[Dict]:
+    def get_history(self, session_id: str) -> Deque[Dict]:
         """获取会话历史"""
         self._update_activity(session_id)
-        return self.sessions.get(session_id, [])
+        return self.sessions.get(session_id, deque())
+
+    def export_history(self, session_id: str) -> List[Dict]:
+        """导出会话历史（对外展示用），此时才把时间戳格式化为 ISO 字符串"""
+        return [
+            {**record, "timestamp": datetime.fromtimestamp(record["unix_timestamp"]).isoformat()}
+            for record in self.get_history(session_id)
+        ]
 
     def add_message(self, session_id: str, user_message: str, bot_reply: str):
         """添加对话记录"""
@@ -22,16 +34,13 @@ class SessionManager:
         message_record = {
             "user_message": user_message,
             "bot_reply": bot_reply,
-            "timestamp": datetime.now().isoformat(),
+            # 只记录一次 time.time()；ISO 格式的时间在 export_history 中按需生成
             "unix_timestamp": time.time()
         }
 
+        # deque 的 maxlen 自动限制历史长度
         self.sessions[session_id].append(message_record)
 
-        #限制历史长度
-        if len(self.sessions[session_id]) > self.max_history_length:
-            self.sessions[session_id] = self.sessions[session_id][-self.max_history_length:]
-
     def clear_session(self, session_id: str):
         """清除会话"""
         if session_id in self.sessions:
@@ -52,20 +61,22 @@ class SessionManager:
 
     def _update_activity(self, session_id: str):
         """更新会话活跃时间"""
-        self.last_activity[session_id] = time.time()
+        now = time.time()
+        self.last_activity[session_id] = now
+        heapq.heappush(self._activity_heap, (now, session_id))
 
     def cleanup_inactive_sessions(self, timeout_hours: int = 24):
-        """清理不活跃的会话"""
-        current_time = time.time()
-        timeout_seconds = timeout_hours * 3600
-
-        inactive_sessions = [
-            session_id for session_id, last_time in self.last_activity.items()
-            if current_time - last_time > timeout_seconds
-        ]
+        """清理不活跃的会话：只处理堆顶已过期的记录，不再扫描全部会话"""
+        cutoff = time.time() - timeout_hours * 3600
+        heap = self._activity_heap
+        cleared = 0
 
-        for session_id in inactive_sessions:
-            self.clear_session(session_id)
+        while heap and heap[0][0] < cutoff:
+            last_time, session_id = heapq.heappop(heap)
+            # 只有该记录仍是会话最近一次活跃时间时才清理，否则说明之后又活跃过（或已被清除）
+            if self.last_activity.get(session_id) == last_time:
+                self.clear_session(session_id)
+                cleared += 1
 
-        return len(inactive_sessions)
+        return cleared
 
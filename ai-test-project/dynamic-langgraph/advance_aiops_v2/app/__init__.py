@@ -3,16 +3,14 @@ app 包 - 工作流 API 应用
 
 包含：
 - api_schema: API 数据模型
+- schema_fast: 请求体快速解析模型（msgspec）
 - service: 业务逻辑层
 - routes: API 路由定义
 """
 
 from .service import WorkflowService, workflow_service
-from .api_schema import (
-    WorkflowCreateRequest,
-    WorkflowExecuteRequest,
-    WorkflowResponse,
-)
+from .schema_fast import WorkflowCreateRequest, WorkflowExecuteRequest
+from .api_schema import WorkflowResponse
 
 __all__ = [
     'WorkflowService',
@@ -2,37 +2,50 @@
 API 数据模型定义
 
 包含所有 FastAPI 接口所需的请求和响应模型
+
+说明: 这里只有模型的类定义，校验和序列化都由 pydantic v2 的 pydantic-core（Rust 编译）完成，
+本模块没有 Python 层的热点循环，用 Cython 编译拿不到收益，因此保持纯 Python 源码
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 
+class ApiModel(BaseModel):
+    """
+    所有接口模型的基类（pydantic v2）
+
+    - from_attributes: 允许直接从带同名属性的对象（如 workflow.models 中的模型）构造
+    - extra='ignore': 忽略请求体中多余的字段
+    """
+    model_config = ConfigDict(from_attributes=True, extra='ignore')
+
+
 # ==================== 工作流配置相关 ====================
 
-class NodeDefinitionRequest(BaseModel):
+class NodeDefinitionRequest(ApiModel):
     """节点定义请求"""
     name: str = Field(..., description="节点名称")
     type: str = Field(..., description="节点类型: planner, worker, reflection, agent")
     config: Dict[str, Any] = Field(..., description="节点配置")
 
 
-class EdgeDefinitionRequest(BaseModel):
+class EdgeDefinitionRequest(ApiModel):
     """边定义请求"""
     source: str = Field(..., description="源节点名称")
     target: str = Field(..., description="目标节点名称")
     condition: Optional[str] = Field(None, description="条件路由键名")
 
 
-class StateFieldRequest(BaseModel):
+class StateFieldRequest(ApiModel):
     """状态字段定义请求"""
     type: str = Field(..., description="字段类型: str, int, float, bool, dict, list")
     description: str = Field("", description="字段描述")
     default: Optional[Any] = Field(None, description="默认值")
 
 
-class WorkflowCreateRequest(BaseModel):
+class WorkflowCreateRequest(ApiModel):
     """工作流创建请求"""
     workflow_id: str = Field(..., description="工作流唯一ID")
     nodes: List[NodeDefinitionRequest] = Field(..., description="节点列表")
@@ -43,7 +56,7 @@ class WorkflowCreateRequest(BaseModel):
 
 # ==================== 工作流执行相关 ====================
 
-class WorkflowExecuteRequest(BaseModel):
+class WorkflowExecuteRequest(ApiModel):
     """工作流执行请求"""
     workflow_id: str = Field(..., description="工作流ID")
     input_data: Dict[str, Any] = Field(..., description="输入数据")
@@ -51,7 +64,7 @@ class WorkflowExecuteRequest(BaseModel):
 
 # ==================== API 响应相关 ====================
 
-class WorkflowResponse(BaseModel):
+class WorkflowResponse(ApiModel):
     """工作流操作响应"""
     workflow_id: str
     status: str
@@ -59,14 +72,14 @@ class WorkflowResponse(BaseModel):
     data: Optional[Any] = None
 
 
-class WorkflowListResponse(BaseModel):
+class WorkflowListResponse(ApiModel):
     """工作流列表响应"""
     total: int
     workflows: List[str]
-    timestamp: str
+    timestamp: datetime
 
 
-class WorkflowDetailResponse(BaseModel):
+class WorkflowDetailResponse(ApiModel):
     """工作流详情响应"""
     workflow_id: str
     entry_point: str
@@ -75,56 +88,62 @@ class WorkflowDetailResponse(BaseModel):
     state_fields: Dict[str, Dict[str, Any]]
 
 
-class WorkflowExecuteResponse(BaseModel):
+class WorkflowExecuteResponse(ApiModel):
     """工作流执行响应"""
     status: str
     workflow_id: str
     message: str
     result: Dict[str, Any]
-    timestamp: str
+    timestamp: datetime
+
+
+class WorkflowBatchExecuteResponse(ApiModel):
+    """批量执行响应（results 与请求顺序一致，失败的项 status 为 error）"""
+    total: int
+    results: List[WorkflowExecuteResponse]
 
 
-class OperatorLogSchema(BaseModel):
+class OperatorLogSchema(ApiModel):
     """操作符日志字段定义"""
     type: str
     description: str
 
 
-class OperatorLogResponse(BaseModel):
+class OperatorLogResponse(ApiModel):
     """操作符日志响应"""
     workflow_id: str
     total_nodes: int
     operator_logs: Dict[str, Dict[str, Dict[str, OperatorLogSchema]]]
 
 
-class ExecutionLogEntry(BaseModel):
+class ExecutionLogEntry(ApiModel):
     """执行日志条目"""
     node_name: str
     node_type: str
-    timestamp: str
+    timestamp: datetime
     execution_time_ms: float
     input_data: Dict[str, Any]
     output_data: Dict[str, Any]
     error: Optional[str] = None
 
 
-class ExecutionHistoryResponse(BaseModel):
+class ExecutionHistoryResponse(ApiModel):
     """执行历史响应"""
     workflow_id: str
     total_logs: int
     logs: List[ExecutionLogEntry]
 
 
-class WorkflowLogsResponse(BaseModel):
+class WorkflowLogsResponse(ApiModel):
     """完整工作流日志响应"""
     workflow_id: str
     operator_logs: Dict[str, Dict[str, Dict[str, OperatorLogSchema]]]
     execution_history: List[ExecutionLogEntry]
     total_executions: int
-    timestamp: str
+    timestamp: datetime
 
 
-class NodeExecutionHistoryResponse(BaseModel):
+class NodeExecutionHistoryResponse(ApiModel):
     """节点执行历史响应"""
     workflow_id: str
     node_name: str
@@ -132,7 +151,7 @@ class NodeExecutionHistoryResponse(BaseModel):
     logs: List[ExecutionLogEntry]
 
 
-class ApiInfoResponse(BaseModel):
+class ApiInfoResponse(ApiModel):
     """API 信息响应"""
     name: str
     version: str
@@ -140,15 +159,15 @@ class ApiInfoResponse(BaseModel):
     endpoints: Dict[str, List[str]]
 
 
-class ErrorResponse(BaseModel):
+class ErrorResponse(ApiModel):
     """错误响应"""
     status: str = "error"
     message: str
-    timestamp: str
+    timestamp: datetime
 
 
-class SuccessResponse(BaseModel):
+class SuccessResponse(ApiModel):
     """成功响应"""
     status: str = "success"
     message: str
-    timestamp: str
+    timestamp: datetime
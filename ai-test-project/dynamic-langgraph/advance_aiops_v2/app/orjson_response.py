@@ -0,0 +1,30 @@
+"""
+基于 orjson 的 JSON 响应
+
+orjson 由 Rust 实现，序列化速度明显快于标准库 json，
+日志类接口返回的大数组（execution_history 等）受益最明显
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def dumps(content: Any) -> bytes:
+    """按统一选项序列化为 JSON 字节串（响应渲染和预序列化缓存共用）"""
+    # datetime/UUID 等由 orjson 原生处理；其余无法识别的对象退化为 str()
+    return orjson.dumps(
+        content,
+        default=str,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+    )
+
+
+class ORJSONResponse(JSONResponse):
+    """使用 orjson 序列化的 JSON 响应"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
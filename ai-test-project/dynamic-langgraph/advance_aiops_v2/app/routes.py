@@ -4,55 +4,154 @@ API 路由定义
 包含所有 API 端点的路由定义
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, FastAPI, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
 from datetime import datetime
+from typing import List, Optional
+import asyncio
 
+import msgspec
+
+from . import schema_fast
 from .api_schema import (
     WorkflowCreateRequest, WorkflowExecuteRequest,
     WorkflowResponse, WorkflowListResponse, WorkflowDetailResponse,
-    WorkflowExecuteResponse, OperatorLogResponse, ExecutionHistoryResponse,
+    WorkflowExecuteResponse, WorkflowBatchExecuteResponse, OperatorLogResponse, ExecutionHistoryResponse,
     WorkflowLogsResponse, NodeExecutionHistoryResponse, ApiInfoResponse
 )
-from .service import workflow_service
+from .orjson_response import ORJSONResponse, dumps
+from .service import workflow_service, WorkflowNotFoundError
+
+
+# 创建路由器（默认使用 orjson 序列化响应）
+router = APIRouter(default_response_class=ORJSONResponse)
+
+
+# ==================== 异常处理 ====================
+# 各接口不再各自 try/except 转换为 HTTPException，统一由应用级异常处理器映射状态码:
+# - WorkflowNotFoundError（工作流不存在）→ 404
+# - pydantic ValidationError（如执行时输入数据不符合 state_schema）→ 422
+# - WorkflowCreateError（创建失败）及其他 ValueError（参数不一致等）→ 400
+# - 其他异常 → 500
+# 处理器按异常类的继承关系匹配，子类优先: WorkflowNotFoundError、ValidationError 都是 ValueError 的子类，
+# 不会落到 ValueError 的处理器上
+
+async def _workflow_not_found_handler(request: Request, exc: WorkflowNotFoundError):
+    return ORJSONResponse({"detail": str(exc)}, status_code=404)
+
+
+async def _validation_error_handler(request: Request, exc: ValidationError):
+    return ORJSONResponse({"detail": exc.errors(include_url=False, include_context=False)}, status_code=422)
+
+
+async def _value_error_handler(request: Request, exc: ValueError):
+    return ORJSONResponse({"detail": str(exc)}, status_code=400)
+
+
+async def _unhandled_error_handler(request: Request, exc: Exception):
+    return ORJSONResponse({"detail": str(exc)}, status_code=500)
+
+
+def register_exception_handlers(app: FastAPI) -> None:
+    """在应用上注册本模块接口使用的异常处理器（按异常类型的继承关系匹配，子类优先）"""
+    app.add_exception_handler(WorkflowNotFoundError, _workflow_not_found_handler)
+    app.add_exception_handler(ValidationError, _validation_error_handler)
+    app.add_exception_handler(ValueError, _value_error_handler)
+    app.add_exception_handler(Exception, _unhandled_error_handler)
 
 
-# 创建路由器
-router = APIRouter()
+# ==================== 请求体解析 ====================
+# 创建/执行接口的请求体不经 FastAPI 的 pydantic 解析，而是读取原始 body 后由 msgspec 一步解码校验
+# （模型见 schema_fast）；api_schema 中的同名 pydantic 模型用于生成 OpenAPI 文档，
+# 以及在 msgspec 解码失败时重新校验一遍，生成与 FastAPI 一致的 422 错误列表
+
+_CREATE_BODY = TypeAdapter(WorkflowCreateRequest)
+_EXECUTE_BODY = TypeAdapter(WorkflowExecuteRequest)
+_BATCH_EXECUTE_BODY = TypeAdapter(List[WorkflowExecuteRequest])
+
+
+async def _decode_body(http_request: Request, decoder: msgspec.json.Decoder, adapter: TypeAdapter):
+    """
+    用 msgspec 解码请求体，格式或类型不符时与 FastAPI 一样返回 422
+
+    msgspec 遇到第一个错误就停止，错误里也没有结构化的位置信息；失败时（只在出错的请求上）
+    改用对应的 pydantic 模型校验，把全部错误按 FastAPI 的格式（loc 以 "body" 开头）返回
+    """
+    body = await http_request.body()
+    try:
+        return decoder.decode(body)
+    except msgspec.DecodeError as e:  # ValidationError 是 DecodeError 的子类
+        try:
+            adapter.validate_json(body)
+        except ValidationError as validation_error:
+            raise RequestValidationError([
+                {**error, "loc": ("body", *error["loc"])}
+                for error in validation_error.errors(include_url=False)
+            ])
+        # 两边规则不一致、pydantic 校验通过时，仍按 msgspec 的结果报错
+        raise RequestValidationError([{"type": "value_error", "loc": ("body",), "msg": str(e), "input": None}])
+
+
+def _request_body_doc(model) -> dict:
+    """把 pydantic 模型（或 List[模型] 等类型）的 JSON Schema（嵌套模型就地展开）放进 openapi_extra，让文档仍能展示请求体"""
+    schema = TypeAdapter(model).json_schema()
+    defs = schema.pop("$defs", {})
+
+    def resolve(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return resolve(defs[node["$ref"].rsplit("/", 1)[-1]])
+            return {key: resolve(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [resolve(value) for value in node]
+        return node
+
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": resolve(schema)}}}}
 
 
 # ==================== 基础 API ====================
 
-@router.get("/", response_model=ApiInfoResponse, tags=["基础"])
+# API 信息是常量，导入时序列化一次，每次请求直接返回同一份字节
+_ROOT_BYTES = dumps({
+    "name": "动态工作流管理 API",
+    "version": "1.0.0",
+    "description": "支持创建、配置、执行和监控 LangGraph 工作流",
+    "endpoints": {
+        "工作流管理": [
+            "POST /workflows - 创建工作流",
+            "GET /workflows - 列出所有工作流",
+            "GET /workflows/{workflow_id} - 查看工作流详情",
+            "DELETE /workflows/{workflow_id} - 删除工作流",
+        ],
+        "工作流执行": [
+            "POST /workflows/{workflow_id}/execute - 执行工作流",
+            "POST /workflows/batch-execute - 批量执行工作流",
+        ],
+        "工作流日志": [
+            "GET /workflows/{workflow_id}/logs - 查看完整日志",
+            "GET /workflows/{workflow_id}/execution-history - 查看执行历史",
+            "GET /workflows/{workflow_id}/operator-logs - 查看操作符日志",
+            "GET /workflows/{workflow_id}/node/{node_name}/execution-history - 查看节点执行历史",
+        ]
+    }
+})
+
+
+@router.get("/", responses={200: {"model": ApiInfoResponse}}, tags=["基础"])
 async def root():
     """根路由 - API 信息"""
-    return {
-        "name": "动态工作流管理 API",
-        "version": "1.0.0",
-        "description": "支持创建、配置、执行和监控 LangGraph 工作流",
-        "endpoints": {
-            "工作流管理": [
-                "POST /workflows - 创建工作流",
-                "GET /workflows - 列出所有工作流",
-                "GET /workflows/{workflow_id} - 查看工作流详情",
-                "DELETE /workflows/{workflow_id} - 删除工作流",
-            ],
-            "工作流执行": [
-                "POST /workflows/{workflow_id}/execute - 执行工作流",
-            ],
-            "工作流日志": [
-                "GET /workflows/{workflow_id}/logs - 查看完整日志",
-                "GET /workflows/{workflow_id}/execution-history - 查看执行历史",
-                "GET /workflows/{workflow_id}/operator-logs - 查看操作符日志",
-                "GET /workflows/{workflow_id}/node/{node_name}/execution-history - 查看节点执行历史",
-            ]
-        }
-    }
+    return Response(_ROOT_BYTES, media_type="application/json")
 
 
 # ==================== 工作流管理 API ====================
+# 查询类接口的返回值由 service 层按固定结构构造，不再经 response_model 重复校验，
+# 直接返回 ORJSONResponse；响应模型只通过 responses 参数保留在 OpenAPI 文档中
 
-@router.post("/workflows", response_model=WorkflowResponse, tags=["工作流管理"])
-async def create_workflow(request: WorkflowCreateRequest):
+@router.post("/workflows", response_model=WorkflowResponse, tags=["工作流管理"],
+             openapi_extra=_request_body_doc(WorkflowCreateRequest))
+async def create_workflow(http_request: Request):
     """
     创建和注册一个新工作流
     
@@ -78,55 +177,34 @@ async def create_workflow(request: WorkflowCreateRequest):
     }
     ```
     """
-    try:
-        return await _handle_service_call(
-            lambda: workflow_service.create_workflow(request)
-        )
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    request = await _decode_body(http_request, schema_fast.CREATE_DECODER, _CREATE_BODY)
+    return workflow_service.create_workflow(request)
 
 
-@router.get("/workflows", response_model=WorkflowListResponse, tags=["工作流管理"])
+@router.get("/workflows", responses={200: {"model": WorkflowListResponse}}, tags=["工作流管理"])
 async def list_workflows():
     """列出所有已注册的工作流"""
-    try:
-        return await _handle_service_call(
-            lambda: workflow_service.list_workflows()
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return ORJSONResponse(workflow_service.list_workflows())
 
 
-@router.get("/workflows/{workflow_id}", response_model=WorkflowDetailResponse, tags=["工作流管理"])
+@router.get("/workflows/{workflow_id}", responses={200: {"model": WorkflowDetailResponse}}, tags=["工作流管理"])
 async def get_workflow(workflow_id: str):
-    """获取工作流的详细信息"""
-    try:
-        return await _handle_service_call(
-            lambda: workflow_service.get_workflow(workflow_id)
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    """获取工作流的详细信息（service 返回预先序列化好的 JSON 字节，直接作为响应体）"""
+    return Response(workflow_service.get_workflow(workflow_id), media_type="application/json")
 
 
 @router.delete("/workflows/{workflow_id}", tags=["工作流管理"])
 async def delete_workflow(workflow_id: str):
     """删除一个工作流"""
-    try:
-        return await _handle_service_call(
-            lambda: workflow_service.delete_workflow(workflow_id)
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return workflow_service.delete_workflow(workflow_id)
 
 
 # ==================== 工作流执行 API ====================
 
-@router.post("/workflows/{workflow_id}/execute", response_model=WorkflowExecuteResponse, tags=["工作流执行"])
-async def execute_workflow(workflow_id: str, request: WorkflowExecuteRequest):
+@router.post("/workflows/{workflow_id}/execute",
+             responses={200: {"model": WorkflowExecuteResponse}}, tags=["工作流执行"],
+             openapi_extra=_request_body_doc(WorkflowExecuteRequest))
+async def execute_workflow(workflow_id: str, http_request: Request):
     """
     执行一个工作流
     
@@ -140,80 +218,78 @@ async def execute_workflow(workflow_id: str, request: WorkflowExecuteRequest):
     }
     ```
     """
-    try:
-        # 验证 workflow_id 一致性
-        if request.workflow_id != workflow_id:
-            raise ValueError("请求体中的 workflow_id 与 URL 中的 workflow_id 不一致")
-        
-        return await _handle_service_call(
-            lambda: workflow_service.execute_workflow(workflow_id, request.input_data)
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    request = await _decode_body(http_request, schema_fast.EXECUTE_DECODER, _EXECUTE_BODY)
+    # 验证 workflow_id 一致性
+    if request.workflow_id != workflow_id:
+        raise ValueError("请求体中的 workflow_id 与 URL 中的 workflow_id 不一致")
+    
+    # 工作流执行可能很慢，走 LangGraph 的异步执行: 同步节点在线程池中运行、分支节点并发执行，
+    # 不阻塞事件循环上的其他请求；其余查询类接口都是微秒级的内存读取，直接在事件循环中调用
+    result = await workflow_service.aexecute_workflow(workflow_id, request.input_data)
+    return ORJSONResponse(result)
+
+
+@router.post("/workflows/batch-execute",
+             responses={200: {"model": WorkflowBatchExecuteResponse}}, tags=["工作流执行"],
+             openapi_extra=_request_body_doc(List[WorkflowExecuteRequest]))
+async def batch_execute_workflows(http_request: Request):
+    """
+    在一次请求中执行多个工作流（一次 HTTP 往返、一次请求体解析、一次响应序列化）
+    
+    各项并发执行，结果按请求顺序返回；某一项失败时该项的 status 为 error，不影响其他项
+    
+    示例请求体:
+    ```json
+    [
+        {"workflow_id": "my_workflow", "input_data": {"input": "查询一"}},
+        {"workflow_id": "my_workflow", "input_data": {"input": "查询二"}}
+    ]
+    ```
+    """
+    requests = await _decode_body(http_request, schema_fast.BATCH_EXECUTE_DECODER, _BATCH_EXECUTE_BODY)
+    results = await asyncio.gather(*(
+        workflow_service.aexecute_batch_item(request.workflow_id, request.input_data)
+        for request in requests
+    ))
+    return ORJSONResponse({"total": len(results), "results": results})
 
 
 # ==================== 工作流日志 API ====================
+# 日志类接口的返回数组可能很大，同样直接返回 ORJSONResponse
 
-@router.get("/workflows/{workflow_id}/logs", response_model=WorkflowLogsResponse, tags=["工作流日志"])
+@router.get("/workflows/{workflow_id}/logs",
+            responses={200: {"model": WorkflowLogsResponse}}, tags=["工作流日志"])
 async def get_workflow_logs(workflow_id: str):
-    """获取工作流的完整日志（包括操作符日志和执行历史）"""
-    try:
-        return await _handle_service_call(
-            lambda: workflow_service.get_workflow_logs(workflow_id)
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/workflows/{workflow_id}/execution-history", response_model=ExecutionHistoryResponse, tags=["工作流日志"])
-async def get_execution_history(workflow_id: str):
-    """获取工作流的执行历史"""
-    try:
-        return await _handle_service_call(
-            lambda: workflow_service.get_execution_history(workflow_id)
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    """获取工作流的完整日志（包括操作符日志和执行历史），执行历史分批流式写出"""
+    return StreamingResponse(workflow_service.stream_workflow_logs(workflow_id), media_type="application/json")
+
 
+@router.get("/workflows/{workflow_id}/execution-history",
+            responses={200: {"model": ExecutionHistoryResponse}}, tags=["工作流日志"])
+async def get_execution_history(
+    workflow_id: str,
+    offset: int = Query(0, ge=0, description="跳过的日志条数"),
+    limit: Optional[int] = Query(None, ge=1, description="最多返回的日志条数，不传表示全部"),
+):
+    """获取工作流的执行历史（支持 offset/limit 分页），日志分批流式写出"""
+    return StreamingResponse(workflow_service.stream_execution_history(workflow_id, offset, limit),
+                             media_type="application/json")
 
-@router.get("/workflows/{workflow_id}/operator-logs", response_model=OperatorLogResponse, tags=["工作流日志"])
+
+@router.get("/workflows/{workflow_id}/operator-logs",
+            responses={200: {"model": OperatorLogResponse}}, tags=["工作流日志"])
 async def get_operator_logs(workflow_id: str):
-    """获取工作流的操作符日志（节点的输入输出 Schema）"""
-    try:
-        return await _handle_service_call(
-            lambda: workflow_service.get_operator_logs(workflow_id)
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@router.get("/workflows/{workflow_id}/node/{node_name}/execution-history", 
-            response_model=NodeExecutionHistoryResponse, tags=["工作流日志"])
-async def get_node_execution_history(workflow_id: str, node_name: str):
-    """获取特定节点的执行历史"""
-    try:
-        return await _handle_service_call(
-            lambda: workflow_service.get_node_execution_history(workflow_id, node_name)
-        )
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    """获取工作流的操作符日志（节点的输入输出 Schema，service 返回缓存的 JSON 字节）"""
+    return Response(workflow_service.get_operator_logs(workflow_id), media_type="application/json")
 
 
-# ==================== 工具函数 ====================
+@router.get("/workflows/{workflow_id}/node/{node_name}/execution-history",
+            responses={200: {"model": NodeExecutionHistoryResponse}}, tags=["工作流日志"])
+async def get_node_execution_history(
+    workflow_id: str,
+    node_name: str,
+    limit: Optional[int] = Query(None, ge=1, description="只返回最近的若干条，不传表示全部"),
+):
+    """获取特定节点的执行历史"""
+    return ORJSONResponse(workflow_service.get_node_execution_history(workflow_id, node_name, limit))
 
-async def _handle_service_call(service_func):
-    """处理服务调用的通用函数"""
-    try:
-        return service_func()
-    except Exception as e:
-        raise
@@ -0,0 +1,59 @@
+"""
+请求体快速解析模型（msgspec）
+
+POST /workflows 和 POST /workflows/{workflow_id}/execute 的请求体在这里用 msgspec.Struct 定义，
+路由直接把原始 body 交给 msgspec 解码并校验（C 实现，一步完成 JSON 解析 + 类型检查），
+不再经过 FastAPI 的 pydantic 请求体解析
+
+字段与 api_schema 中同名的 pydantic 模型保持一致，后者继续用于生成 OpenAPI 文档
+"""
+
+from typing import Dict, Any, List, Optional
+
+import msgspec
+
+
+# ==================== 工作流配置相关 ====================
+
+class NodeDefinitionRequest(msgspec.Struct, frozen=True):
+    """节点定义请求"""
+    name: str
+    type: str
+    config: Dict[str, Any]
+
+
+class EdgeDefinitionRequest(msgspec.Struct, frozen=True):
+    """边定义请求"""
+    source: str
+    target: str
+    condition: Optional[str] = None
+
+
+class StateFieldRequest(msgspec.Struct, frozen=True):
+    """状态字段定义请求"""
+    type: str
+    description: str = ""
+    default: Optional[Any] = None
+
+
+class WorkflowCreateRequest(msgspec.Struct, frozen=True):
+    """工作流创建请求"""
+    workflow_id: str
+    nodes: List[NodeDefinitionRequest]
+    edges: List[EdgeDefinitionRequest]
+    state_schema: Dict[str, StateFieldRequest]
+    entry_point: str
+
+
+# ==================== 工作流执行相关 ====================
+
+class WorkflowExecuteRequest(msgspec.Struct, frozen=True):
+    """工作流执行请求"""
+    workflow_id: str
+    input_data: Dict[str, Any]
+
+
+# 解码器在导入时创建一次，每个请求复用（类型信息只解析一次）
+CREATE_DECODER = msgspec.json.Decoder(WorkflowCreateRequest)
+EXECUTE_DECODER = msgspec.json.Decoder(WorkflowExecuteRequest)
+BATCH_EXECUTE_DECODER = msgspec.json.Decoder(List[WorkflowExecuteRequest])  # 批量执行: 执行请求的数组
@@ -2,23 +2,76 @@
 业务逻辑层 - 工作流服务
 
 处理工作流的创建、执行、查询等业务逻辑
+
+日志等批量数据的转换交给 pydantic-core / msgspec / orjson 完成，
+本模块里只剩少量的字典组装，不需要再单独编译成扩展模块
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from datetime import datetime
+from functools import lru_cache
 
-import sys
-sys.path.insert(0, '/Users/gaorj/PycharmProjects/Learning/ai-quickstart/ai-test-project/dynamic-langgraph/advance_aiops_v2')
+import msgspec
+from pydantic import TypeAdapter
 
+# workflow 与 app 是项目根目录下的同级包，服务从项目根目录启动（见 run_server.sh），直接按顶层包导入
 from workflow.models import (
-    WorkflowDefinition, NodeDefinition, EdgeDefinition, StateFieldSchema,
-    NodeType
+    WorkflowDefinition, NodeDefinition,
+    NodeType, ExecutionLog, OperatorLog
 )
 from workflow.graph_builder import WorkflowRegistry
-from .api_schema import (
-    WorkflowCreateRequest, WorkflowExecuteRequest,
-    NodeDefinitionRequest, EdgeDefinitionRequest, StateFieldRequest
-)
+from .schema_fast import WorkflowCreateRequest
+from .orjson_response import dumps
+
+
+# 节点类型取值 → 枚举成员，导入时构建一次；按值查字典，比 NodeType(value) 的枚举构造协议更直接
+_NODE_TYPE_MAP = {node_type.value: node_type for node_type in NodeType}
+
+
+def _node_type(value: str) -> NodeType:
+    """按取值查找节点类型，未知取值时抛出与 NodeType(value) 相同的 ValueError"""
+    node_type = _NODE_TYPE_MAP.get(value)
+    if node_type is None:
+        raise ValueError(f"{value!r} is not a valid NodeType")
+    return node_type
+
+
+# 执行日志（ExecutionLog）是 slots 数据类，orjson 可以直接序列化（datetime、枚举同样原生处理），
+# 接口返回时原样放进响应，不再先转换为字典
+# 流式输出日志时每批序列化的条数: 一批序列化成一段 JSON 写出，内存峰值只有一批的大小
+_LOG_STREAM_BATCH = 500
+
+# 操作符日志转换器: 整个字典在 pydantic-core（Rust）中一次转换为普通字典，
+# 只保留字段的 type 和 description
+_OPERATOR_LOGS = TypeAdapter(Dict[str, OperatorLog])
+_OPERATOR_LOG_EXCLUDE = {
+    "__all__": {
+        "node_name": True,
+        "input_schema": {"__all__": {"default"}},
+        "output_schema": {"__all__": {"default"}},
+    }
+}
+
+
+def _dump_operator_logs(op_logs: Dict[str, OperatorLog]) -> Dict[str, Dict[str, Any]]:
+    """操作符日志 → {节点名: {"input_schema": ..., "output_schema": ...}}"""
+    return _OPERATOR_LOGS.dump_python(op_logs, exclude=_OPERATOR_LOG_EXCLUDE)
+
+
+def _iter_json_items(items: List[Any]) -> Iterator[bytes]:
+    """把列表按批序列化为 JSON 数组的元素部分（不含首尾方括号），供流式响应拼接"""
+    for start in range(0, len(items), _LOG_STREAM_BATCH):
+        # 一批序列化为 JSON 数组后去掉首尾的方括号，批与批之间补逗号
+        batch = dumps(items[start:start + _LOG_STREAM_BATCH])[1:-1]
+        yield batch if start == 0 else b"," + batch
+
+
+class WorkflowCreateError(ValueError):
+    """创建工作流失败（请求内容有误，接口层映射为 400）"""
+
+
+class WorkflowNotFoundError(ValueError):
+    """工作流不存在（接口层映射为 404）"""
 
 
 class WorkflowService:
@@ -27,6 +80,12 @@ class WorkflowService:
     def __init__(self):
         """初始化服务"""
         self.registry = WorkflowRegistry()
+        # 工作流详情的 JSON 字节缓存: {工作流ID: (注册表版本号, JSON 字节)}，注册时写入；
+        # 直接经 registry 重新注册同一 ID 时版本号变化，查询时发现不一致即重建，不会返回旧定义
+        self._detail_cache: Dict[str, Tuple[int, bytes]] = {}
+        # 操作符日志（{节点名: {input_schema, output_schema}}）的 JSON 字节缓存，/operator-logs 与 /logs 共用；
+        # 按 (工作流ID, 注册表版本号) 缓存: 重新注册/删除后版本号变化，旧条目自然失效
+        self._operator_logs_json = lru_cache(maxsize=256)(self._serialize_operator_logs)
     
     # ==================== 工作流管理 ====================
     
@@ -35,66 +94,43 @@ class WorkflowService:
         创建工作流
         
         Args:
-            request: 工作流创建请求
+            request: 工作流创建请求（msgspec.Struct，见 schema_fast）
             
         Returns:
             包含创建结果的字典
         """
         try:
-            # 构建状态字段定义
-            state_schema = {
-                field_name: StateFieldSchema(
-                    type=field_def.type,
-                    description=field_def.description,
-                    default=field_def.default
-                )
-                for field_name, field_def in request.state_schema.items()
-            }
+            # 请求结构体一次性导出为普通字典（msgspec C 实现），
+            # 状态字段和边直接交给 WorkflowDefinition 校验构造，不再逐个字段手工复制
+            data = msgspec.to_builtins(request)
             
             # 构建节点定义
             nodes = [
-                NodeDefinition(
-                    name=node.name,
-                    type=NodeType(node.type),
-                    config=node.config
-                )
+                NodeDefinition(node.name, _node_type(node.type), node.config)
                 for node in request.nodes
             ]
             
-            # 构建边定义
-            edges = [
-                EdgeDefinition(
-                    source=edge.source,
-                    target=edge.target,
-                    condition=edge.condition
-                )
-                for edge in request.edges
-            ]
-            
             # 创建工作流定义
-            workflow_def = WorkflowDefinition(
-                workflow_id=request.workflow_id,
-                entry_point=request.entry_point,
-                state_schema=state_schema,
-                nodes=nodes,
-                edges=edges
-            )
+            data["nodes"] = nodes
+            workflow_def = WorkflowDefinition.model_validate(data)
             
-            # 注册工作流
+            # 注册工作流，并预先序列化详情（同 ID 重新注册时覆盖旧缓存）
+            self._detail_cache.pop(workflow_def.workflow_id, None)
             self.registry.register_workflow(workflow_def)
+            self._cache_workflow_detail(workflow_def)
             
             return {
                 "status": "success",
                 "workflow_id": request.workflow_id,
                 "message": f"工作流 '{request.workflow_id}' 创建成功",
                 "data": {
-                    "nodes_count": len(nodes),
-                    "edges_count": len(edges),
+                    "nodes_count": len(workflow_def.nodes),
+                    "edges_count": workflow_def.edges_count,
                     "entry_point": request.entry_point
                 }
             }
         except Exception as e:
-            raise ValueError(f"创建工作流失败: {str(e)}")
+            raise WorkflowCreateError(f"创建工作流失败: {str(e)}")
     
     def list_workflows(self) -> Dict[str, Any]:
         """
@@ -107,10 +143,10 @@ class WorkflowService:
         return {
             "total": len(workflows),
             "workflows": workflows,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         }
     
-    def get_workflow(self, workflow_id: str) -> Dict[str, Any]:
+    def get_workflow(self, workflow_id: str) -> bytes:
         """
         获取工作流详情
         
@@ -118,20 +154,33 @@ class WorkflowService:
             workflow_id: 工作流ID
             
         Returns:
-            工作流详情
+            已序列化的工作流详情 JSON（直接作为响应体返回）
         """
+        cached = self._detail_cache.get(workflow_id)
+        if cached is not None and cached[0] == self.registry.get_version(workflow_id):
+            return cached[1]
+        # 未经本服务注册、或注册后定义被替换的工作流: 查询时重新构建并缓存
         definition = self.registry.get_workflow_definition(workflow_id)
         if not definition:
-            raise ValueError(f"工作流 '{workflow_id}' 不存在")
-        
+            raise WorkflowNotFoundError(f"工作流 '{workflow_id}' 不存在")
+        return self._cache_workflow_detail(definition)
+    
+    def _cache_workflow_detail(self, definition: WorkflowDefinition) -> bytes:
+        """序列化工作流详情，连同当前注册表版本号写入缓存"""
+        detail = dumps(self._build_workflow_detail(definition))
+        self._detail_cache[definition.workflow_id] = (self.registry.get_version(definition.workflow_id), detail)
+        return detail
+    
+    def _build_workflow_detail(self, definition: WorkflowDefinition) -> Dict[str, Any]:
+        """构建工作流详情字典（节点、边、状态字段）"""
         return {
-            "workflow_id": workflow_id,
+            "workflow_id": definition.workflow_id,
             "entry_point": definition.entry_point,
             "nodes": [
                 {
                     "name": node.name,
                     "type": node.type.value,
-                    "config": node.config
+                    "config": dict(node.config)
                 }
                 for node in definition.nodes
             ],
@@ -164,20 +213,23 @@ class WorkflowService:
             删除结果
         """
         if not self.registry.has_workflow(workflow_id):
-            raise ValueError(f"工作流 '{workflow_id}' 不存在")
+            raise WorkflowNotFoundError(f"工作流 '{workflow_id}' 不存在")
         
         self.registry.unregister_workflow(workflow_id)
+        self._detail_cache.pop(workflow_id, None)
         return {
             "status": "success",
             "message": f"工作流 '{workflow_id}' 已删除",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         }
     
     # ==================== 工作流执行 ====================
     
-    def execute_workflow(self, workflow_id: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def aexecute_workflow(self, workflow_id: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        执行工作流
+        异步执行工作流
+        
+        由 LangGraph 的异步执行调度节点: 没有依赖关系的分支节点并发执行，同步节点在线程池中运行
         
         Args:
             workflow_id: 工作流ID
@@ -187,182 +239,158 @@ class WorkflowService:
             执行结果
         """
         if not self.registry.has_workflow(workflow_id):
-            raise ValueError(f"工作流 '{workflow_id}' 不存在")
-        
-        result = self.registry.execute_workflow(workflow_id, input_data)
+            raise WorkflowNotFoundError(f"工作流 '{workflow_id}' 不存在")
         
+        result = await self.registry.aexecute_workflow(workflow_id, input_data)
+        return self._execution_response(workflow_id, result)
+    
+    def _execution_response(self, workflow_id: str, result: Any) -> Dict[str, Any]:
+        """构建执行成功的响应"""
         return {
             "status": "success",
             "workflow_id": workflow_id,
             "message": "工作流执行完成",
             "result": dict(result),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         }
     
+    async def aexecute_batch_item(self, workflow_id: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        执行批量请求中的一项
+        
+        与 aexecute_workflow 返回相同的结构，但失败时不抛出异常，而是返回 status 为 error 的结果，
+        一项失败不影响同一批中的其他项
+        
+        Args:
+            workflow_id: 工作流ID
+            input_data: 输入数据
+            
+        Returns:
+            执行结果
+        """
+        try:
+            return await self.aexecute_workflow(workflow_id, input_data)
+        except Exception as e:
+            return {
+                "status": "error",
+                "workflow_id": workflow_id,
+                "message": str(e),
+                "result": {},
+                "timestamp": datetime.now()
+            }
+    
     # ==================== 工作流日志 ====================
     
-    def get_workflow_logs(self, workflow_id: str) -> Dict[str, Any]:
+    def stream_workflow_logs(self, workflow_id: str) -> Iterator[bytes]:
         """
-        获取工作流的完整日志
+        以流的形式获取工作流的完整日志
+        
+        工作流是否存在在调用时立即检查（不存在时抛出 WorkflowNotFoundError），
+        返回的生成器按批产出 JSON 片段，执行历史再长也不会一次性在内存中拼出整个响应
         
         Args:
             workflow_id: 工作流ID
             
         Returns:
-            完整日志
+            JSON 字节片段的迭代器
         """
         definition = self.registry.get_workflow_definition(workflow_id)
         if not definition:
-            raise ValueError(f"工作流 '{workflow_id}' 不存在")
-        
-        # 获取操作符日志
-        op_logs = self.registry.get_operator_logs(workflow_id)
-        operator_logs = {
-            node_name: {
-                "input_schema": {
-                    field_name: {
-                        "type": field_schema.type,
-                        "description": field_schema.description
-                    }
-                    for field_name, field_schema in op_log.input_schema.items()
-                },
-                "output_schema": {
-                    field_name: {
-                        "type": field_schema.type,
-                        "description": field_schema.description
-                    }
-                    for field_name, field_schema in op_log.output_schema.items()
-                }
-            }
-            for node_name, op_log in op_logs.items()
-        }
-        
-        # 获取执行历史
-        exec_history = self.registry.get_execution_history(workflow_id)
-        execution_logs = [
-            {
-                "node_name": log.node_name,
-                "node_type": log.node_type.value,
-                "timestamp": log.timestamp.isoformat(),
-                "execution_time_ms": log.execution_time_ms,
-                "input_data": log.input_data,
-                "output_data": log.output_data,
-                "error": log.error
-            }
-            for log in exec_history
-        ]
+            raise WorkflowNotFoundError(f"工作流 '{workflow_id}' 不存在")
         
-        return {
-            "workflow_id": workflow_id,
-            "operator_logs": operator_logs,
-            "execution_history": execution_logs,
-            "total_executions": len(execution_logs),
-            "timestamp": datetime.now().isoformat()
-        }
+        operator_logs = self._operator_logs_json(workflow_id, self.registry.get_version(workflow_id))
+        # 取一份快照: 流式输出期间工作流可能仍在执行并追加日志
+        exec_history = list(self.registry.get_execution_history(workflow_id))
+        return self._iter_workflow_logs(workflow_id, operator_logs, exec_history)
+    
+    def _iter_workflow_logs(self, workflow_id: str, operator_logs: bytes,
+                            exec_history: List[ExecutionLog]) -> Iterator[bytes]:
+        """按 {workflow_id, operator_logs, execution_history: [...], total_executions, timestamp} 的顺序产出 JSON"""
+        yield (b'{"workflow_id":' + dumps(workflow_id)
+               + b',"operator_logs":' + operator_logs
+               + b',"execution_history":[')
+        yield from _iter_json_items(exec_history)
+        yield (b'],"total_executions":' + dumps(len(exec_history))
+               + b',"timestamp":' + dumps(datetime.now()) + b'}')
     
-    def get_execution_history(self, workflow_id: str) -> Dict[str, Any]:
+    def stream_execution_history(self, workflow_id: str, offset: int = 0,
+                                 limit: Optional[int] = None) -> Iterator[bytes]:
         """
-        获取执行历史
+        以流的形式获取执行历史，支持 offset/limit 分页
+        
+        工作流是否存在在调用时立即检查（不存在时抛出 WorkflowNotFoundError），日志分批序列化后产出
         
         Args:
             workflow_id: 工作流ID
+            offset: 跳过的条数
+            limit: 最多返回的条数，None 表示不限
             
         Returns:
-            执行历史
+            JSON 字节片段的迭代器
         """
         if not self.registry.has_workflow(workflow_id):
-            raise ValueError(f"工作流 '{workflow_id}' 不存在")
-        
-        exec_history = self.registry.get_execution_history(workflow_id)
+            raise WorkflowNotFoundError(f"工作流 '{workflow_id}' 不存在")
         
-        return {
-            "workflow_id": workflow_id,
-            "total_logs": len(exec_history),
-            "logs": [
-                {
-                    "node_name": log.node_name,
-                    "node_type": log.node_type.value,
-                    "timestamp": log.timestamp.isoformat(),
-                    "execution_time_ms": log.execution_time_ms,
-                    "input_data": log.input_data,
-                    "output_data": log.output_data,
-                    "error": log.error
-                }
-                for log in exec_history
-            ]
-        }
+        # 取所选区间的快照（只复制引用）: 流式输出期间工作流可能仍在执行并追加日志
+        exec_history = list(self.registry.iter_execution_history(workflow_id, offset, limit))
+        return self._iter_execution_history(workflow_id, exec_history)
+    
+    def _iter_execution_history(self, workflow_id: str, exec_history: List[ExecutionLog]) -> Iterator[bytes]:
+        """按 {workflow_id, total_logs, logs: [...]} 的顺序产出 JSON"""
+        yield (b'{"workflow_id":' + dumps(workflow_id)
+               + b',"total_logs":' + dumps(len(exec_history))
+               + b',"logs":[')
+        yield from _iter_json_items(exec_history)
+        yield b']}'
     
-    def get_operator_logs(self, workflow_id: str) -> Dict[str, Any]:
+    def get_operator_logs(self, workflow_id: str) -> bytes:
         """
         获取操作符日志
         
+        操作符日志在注册时生成，之后不再变化，序列化结果按注册表版本号缓存
+        
         Args:
             workflow_id: 工作流ID
             
         Returns:
-            操作符日志
+            已序列化的操作符日志 JSON（直接作为响应体返回）
         """
         if not self.registry.has_workflow(workflow_id):
-            raise ValueError(f"工作流 '{workflow_id}' 不存在")
-        
-        op_logs = self.registry.get_operator_logs(workflow_id)
+            raise WorkflowNotFoundError(f"工作流 '{workflow_id}' 不存在")
         
-        return {
-            "workflow_id": workflow_id,
-            "total_nodes": len(op_logs),
-            "operator_logs": {
-                node_name: {
-                    "input_schema": {
-                        field_name: {
-                            "type": field_schema.type,
-                            "description": field_schema.description
-                        }
-                        for field_name, field_schema in op_log.input_schema.items()
-                    },
-                    "output_schema": {
-                        field_name: {
-                            "type": field_schema.type,
-                            "description": field_schema.description
-                        }
-                        for field_name, field_schema in op_log.output_schema.items()
-                    }
-                }
-                for node_name, op_log in op_logs.items()
-            }
-        }
+        operator_logs = self._operator_logs_json(workflow_id, self.registry.get_version(workflow_id))
+        total_nodes = len(self.registry.get_operator_logs(workflow_id))
+        return (b'{"workflow_id":' + dumps(workflow_id)
+                + b',"total_nodes":' + dumps(total_nodes)
+                + b',"operator_logs":' + operator_logs + b'}')
     
-    def get_node_execution_history(self, workflow_id: str, node_name: str) -> Dict[str, Any]:
+    def _serialize_operator_logs(self, workflow_id: str, version: int) -> bytes:
+        """转换并序列化操作符日志（version 只用作缓存键）"""
+        return dumps(_dump_operator_logs(self.registry.get_operator_logs(workflow_id)))
+    
+    def get_node_execution_history(self, workflow_id: str, node_name: str,
+                                   limit: Optional[int] = None) -> Dict[str, Any]:
         """
         获取节点执行历史
         
         Args:
             workflow_id: 工作流ID
             node_name: 节点名称
+            limit: 只取最近的若干条，None 表示全部
             
         Returns:
             节点执行历史
         """
         if not self.registry.has_workflow(workflow_id):
-            raise ValueError(f"工作流 '{workflow_id}' 不存在")
+            raise WorkflowNotFoundError(f"工作流 '{workflow_id}' 不存在")
         
-        node_history = self.registry.get_node_execution_history(workflow_id, node_name)
+        node_history = self.registry.get_node_execution_history(workflow_id, node_name, limit)
         
         return {
             "workflow_id": workflow_id,
             "node_name": node_name,
             "total_logs": len(node_history),
-            "logs": [
-                {
-                    "node_name": log.node_name,
-                    "node_type": log.node_type.value,
-                    "timestamp": log.timestamp.isoformat(),
-                    "execution_time_ms": log.execution_time_ms,
-                    "input_data": log.input_data,
-                    "output_data": log.output_data,
-                    "error": log.error
-                }
-                for log in node_history
-            ]
+            "logs": node_history
         }
 
 
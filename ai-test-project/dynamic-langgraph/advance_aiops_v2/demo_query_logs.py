@@ -1,12 +1,27 @@
 """
 演示如何查询工作流的 OperatorLog 和 ExecutionLog
+
+输出详细程度由环境变量 DEMO_VERBOSITY 控制（默认 2，DEMO_VERBOSITY=3 时输出全部内容）:
+  1 - 只输出各项查询的条数/概要
+  2 - 再输出每条执行日志的详情（第 4、5 步）
+  3 - 再打印完整的格式化工作流日志（第 7 步）
 """
 
-from workflow import *
+import os
 
+LOG_VERBOSITY = int(os.getenv("DEMO_VERBOSITY", "2"))
 
 def demo_query_logs():
     """演示查询工作流日志的各种方式"""
+    # 在函数内按需导入: 只导入本模块（不运行演示）时不会加载 langgraph 等重量级依赖
+    from workflow import (
+        NodeType,
+        NodeDefinition,
+        EdgeDefinition,
+        StateFieldSchema,
+        WorkflowDefinition,
+        WorkflowRegistry,
+    )
     
     print("\n" + "="*80)
     print("📚 工作流日志查询演示")
@@ -39,26 +54,26 @@ def demo_query_logs():
         ],
         entry_point="planner",
         state_schema={
-            "query": StateFieldSchema(type="str", default="", description="用户查询"),
-            "result": StateFieldSchema(type="str", default="", description="查询结果")
+            "query": StateFieldSchema.of(type="str", default="", description="用户查询"),
+            "result": StateFieldSchema.of(type="str", default="", description="查询结果")
         },
         # operator_logs={
         #     "planner": OperatorLog(
         #         node_name="planner",
         #         input_schema={
-        #             "query": StateFieldSchema(type="str", default="", description="输入查询")
+        #             "query": StateFieldSchema.of(type="str", default="", description="输入查询")
         #         },
         #         output_schema={
-        #             "plan": StateFieldSchema(type="str", default="", description="输出计划")
+        #             "plan": StateFieldSchema.of(type="str", default="", description="输出计划")
         #         }
         #     ),
         #     "worker": OperatorLog(
         #         node_name="worker",
         #         input_schema={
-        #             "plan": StateFieldSchema(type="str", default="", description="执行计划")
+        #             "plan": StateFieldSchema.of(type="str", default="", description="执行计划")
         #         },
         #         output_schema={
-        #             "result": StateFieldSchema(type="str", default="", description="执行结果")
+        #             "result": StateFieldSchema.of(type="str", default="", description="执行结果")
         #         }
         #     )
         # }
@@ -86,8 +101,8 @@ def demo_query_logs():
     print("-" * 80)
     definition = registry.get_workflow_definition("demo_workflow")
     print(f"工作流 ID: {definition.workflow_id}")
-    print(f"节点数: {len(definition.nodes)}")
-    print(f"节点列表: {[node.name for node in definition.nodes]}")
+    print(f"节点数: {len(definition.node_names)}")
+    print(f"节点列表: {list(definition.node_names)}")
     
     # 2. 获取所有 OperatorLog
     print("\n\n2️⃣  获取所有 OperatorLog:")
@@ -117,27 +132,29 @@ def demo_query_logs():
     print("-" * 80)
     execution_history = registry.get_execution_history("demo_workflow")
     print(f"总共有 {len(execution_history)} 条执行日志：")
-    for idx, log in enumerate(execution_history, 1):
-        print(f"\n  [{idx}] {log.node_name}:")
-        print(f"      类型: {log.node_type.value}")
-        print(f"      耗时: {log.execution_time_ms:.2f}ms")
-        print(f"      时间: {log.timestamp}")
-        if log.error:
-            print(f"      ❌ 错误: {log.error}")
-        else:
-            print(f"      ✅ 成功")
+    if LOG_VERBOSITY >= 2:
+        for idx, log in enumerate(execution_history, 1):
+            print(f"\n  [{idx}] {log.node_name}:")
+            print(f"      类型: {log.node_type.value}")
+            print(f"      耗时: {log.execution_time_ms:.2f}ms")
+            print(f"      时间: {log.timestamp}")
+            if log.error:
+                print(f"      ❌ 错误: {log.error}")
+            else:
+                print(f"      ✅ 成功")
     
     # 5. 获取特定节点的 ExecutionLog
     print("\n\n5️⃣  获取特定节点的 ExecutionLog (worker 节点):")
     print("-" * 80)
     worker_history = registry.get_node_execution_history("demo_workflow", "worker")
     print(f"节点 'worker' 的执行日志数: {len(worker_history)}")
-    for idx, log in enumerate(worker_history, 1):
-        print(f"\n  [{idx}] 执行详情:")
-        print(f"      时间: {log.timestamp}")
-        print(f"      耗时: {log.execution_time_ms:.2f}ms")
-        print(f"      输入: {log.input_data}")
-        print(f"      输出: {log.output_data}")
+    if LOG_VERBOSITY >= 2:
+        for idx, log in enumerate(worker_history, 1):
+            print(f"\n  [{idx}] 执行详情:")
+            print(f"      时间: {log.timestamp}")
+            print(f"      耗时: {log.execution_time_ms:.2f}ms")
+            print(f"      输入: {log.input_data}")
+            print(f"      输出: {log.output_data}")
     
     # 6. 获取节点对象（便于直接调用方法）
     print("\n\n6️⃣  获取节点对象:")
@@ -151,9 +168,10 @@ def demo_query_logs():
         print(f"节点执行历史: {len(planner_node.get_execution_history())} 条记录")
     
     # 7. 打印完整的工作流日志
-    print("\n\n7️⃣  打印完整工作流日志 (格式化输出):")
-    print("-" * 80)
-    registry.print_workflow_logs("demo_workflow")
+    if LOG_VERBOSITY >= 3:
+        print("\n\n7️⃣  打印完整工作流日志 (格式化输出):")
+        print("-" * 80)
+        registry.print_workflow_logs("demo_workflow")
     
     # 8. 查询统计信息
     print("\n\n8️⃣  查询注册表统计信息:")
@@ -1,8 +1,13 @@
 """
 动态工作流编排系统使用示例
 展示如何定义、构建、注册和执行复杂的工作流
+
+环境变量 DEMO_VERBOSITY（默认 2）小于 3 时不打印完整的格式化工作流日志，
+需要查看完整日志时用 DEMO_VERBOSITY=3 运行
 """
 
+import os
+
 from workflow import (
     NodeType,
     WorkerSubType,
@@ -14,6 +19,8 @@ from workflow import (
     WorkflowRegistry,
 )
 
+LOG_VERBOSITY = int(os.getenv("DEMO_VERBOSITY", "2"))
+
 
 def example_1_simple_planner_workflow():
     """示例1：简单的 Planner 工作流"""
@@ -41,17 +48,17 @@ def example_1_simple_planner_workflow():
         ],
         entry_point="planner",
         state_schema={
-            "task": StateFieldSchema(type="str", default="", description="任务描述"),
-            "plan": StateFieldSchema(type="str", default="", description="执行计划")
+            "task": StateFieldSchema.of(type="str", default="", description="任务描述"),
+            "plan": StateFieldSchema.of(type="str", default="", description="执行计划")
         },
         operator_logs={
             "planner": OperatorLog(
                 node_name="planner",
                 input_schema={
-                    "task": StateFieldSchema(type="str", default="", description="输入任务")
+                    "task": StateFieldSchema.of(type="str", default="", description="输入任务")
                 },
                 output_schema={
-                    "plan": StateFieldSchema(type="str", default="", description="输出计划")
+                    "plan": StateFieldSchema.of(type="str", default="", description="输出计划")
                 }
             )
         }
@@ -67,7 +74,8 @@ def example_1_simple_planner_workflow():
     
     print(f"执行结果: {result}")
     print(f"注册表状态: {registry.get_registry_stats()}")
-    print(registry.print_workflow_logs("simple_planner_v1"))
+    if LOG_VERBOSITY >= 3:
+        print(registry.print_workflow_logs("simple_planner_v1"))
 
 
 
@@ -132,11 +140,11 @@ def example_2_multi_worker_workflow():
         ],
         entry_point="planner",
         state_schema={
-            "input": StateFieldSchema(type="str", default="", description="用户输入"),
-            "plan": StateFieldSchema(type="str", default="", description="执行计划"),
-            "mcp_result": StateFieldSchema(type="str", default="", description="MCP执行结果"),
-            "rag_analysis": StateFieldSchema(type="str", default="", description="RAG分析结果"),
-            "final_output": StateFieldSchema(type="str", default="", description="最终输出")
+            "input": StateFieldSchema.of(type="str", default="", description="用户输入"),
+            "plan": StateFieldSchema.of(type="str", default="", description="执行计划"),
+            "mcp_result": StateFieldSchema.of(type="str", default="", description="MCP执行结果"),
+            "rag_analysis": StateFieldSchema.of(type="str", default="", description="RAG分析结果"),
+            "final_output": StateFieldSchema.of(type="str", default="", description="最终输出")
         }
     )
     
@@ -150,7 +158,8 @@ def example_2_multi_worker_workflow():
     
     print(f"执行结果: {result}")
     print(registry.get_registry_stats())
-    print(registry.print_workflow_logs("multi_worker_pipeline_v1"))
+    if LOG_VERBOSITY >= 3:
+        print(registry.print_workflow_logs("multi_worker_pipeline_v1"))
 
 
 def example_3_conditional_routing():
@@ -206,11 +215,11 @@ def example_3_conditional_routing():
         ],
         entry_point="classifier",
         state_schema={
-            "data": StateFieldSchema(type="str", default="", description="输入数据"),
-            "route": StateFieldSchema(type="str", default="", description="路由决策"),
-            "result_a": StateFieldSchema(type="str", default="", description="路径A结果"),
-            "result_b": StateFieldSchema(type="str", default="", description="路径B结果"),
-            "final_result": StateFieldSchema(type="str", default="", description="最终结果")
+            "data": StateFieldSchema.of(type="str", default="", description="输入数据"),
+            "route": StateFieldSchema.of(type="str", default="", description="路由决策"),
+            "result_a": StateFieldSchema.of(type="str", default="", description="路径A结果"),
+            "result_b": StateFieldSchema.of(type="str", default="", description="路径B结果"),
+            "final_result": StateFieldSchema.of(type="str", default="", description="最终结果")
         }
     )
     
@@ -252,14 +261,11 @@ def example_4_nested_agent_workflow():
         ],
         entry_point="worker",
         state_schema={
-            "query": StateFieldSchema(type="str", default="", description="查询"),
-            "response": StateFieldSchema(type="str", default="", description="响应")
+            "query": StateFieldSchema.of(type="str", default="", description="查询"),
+            "response": StateFieldSchema.of(type="str", default="", description="响应")
         }
     )
     
-    # 注册基础工作流
-    registry.register_workflow(base_workflow_def)
-    
     # 定义一个主工作流，其中包含一个 Agent 节点引用基础工作流
     main_workflow_def = WorkflowDefinition(
         workflow_id="main_workflow_v1",
@@ -286,14 +292,14 @@ def example_4_nested_agent_workflow():
         ],
         entry_point="dispatcher",
         state_schema={
-            "query": StateFieldSchema(type="str", default="", description="用户查询"),
-            "plan": StateFieldSchema(type="str", default="", description="分派计划"),
-            "final_result": StateFieldSchema(type="str", default="", description="最终结果")
+            "query": StateFieldSchema.of(type="str", default="", description="用户查询"),
+            "plan": StateFieldSchema.of(type="str", default="", description="分派计划"),
+            "final_result": StateFieldSchema.of(type="str", default="", description="最终结果")
         }
     )
     
-    # 注册主工作流
-    registry.register_workflow(main_workflow_def)
+    # 批量注册: 基础工作流排在前面，主工作流的 Agent 节点注册时即可引用它
+    registry.register_workflows([base_workflow_def, main_workflow_def])
     
     # 执行主工作流
     result = registry.execute_workflow("main_workflow_v1", {
@@ -339,26 +345,26 @@ def example_5_workflow_with_logging():
         ],
         entry_point="planner",
         state_schema={
-            "task": StateFieldSchema(type="str", default="", description="任务"),
-            "result": StateFieldSchema(type="str", default="", description="结果")
+            "task": StateFieldSchema.of(type="str", default="", description="任务"),
+            "result": StateFieldSchema.of(type="str", default="", description="结果")
         },
         operator_logs={
             "planner": OperatorLog(
                 node_name="planner",
                 input_schema={
-                    "task": StateFieldSchema(type="str", default="", description="输入任务")
+                    "task": StateFieldSchema.of(type="str", default="", description="输入任务")
                 },
                 output_schema={
-                    "plan": StateFieldSchema(type="str", default="", description="输出计划")
+                    "plan": StateFieldSchema.of(type="str", default="", description="输出计划")
                 }
             ),
             "executor": OperatorLog(
                 node_name="executor",
                 input_schema={
-                    "plan": StateFieldSchema(type="str", default="", description="执行计划")
+                    "plan": StateFieldSchema.of(type="str", default="", description="执行计划")
                 },
                 output_schema={
-                    "result": StateFieldSchema(type="str", default="", description="执行结果")
+                    "result": StateFieldSchema.of(type="str", default="", description="执行结果")
                 }
             )
         }
@@ -374,8 +380,9 @@ def example_5_workflow_with_logging():
     
     print(f"执行结果: {result}")
     print(f"\n注册表统计:")
-    print(f"  总工作流数: {registry.get_registry_stats()['total_workflows']}")
-    print(f"  工作流ID列表: {registry.get_registry_stats()['workflow_ids']}")
+    stats = registry.get_registry_stats()
+    print(f"  总工作流数: {stats['total_workflows']}")
+    print(f"  工作流ID列表: {stats['workflow_ids']}")
 
 
 if __name__ == "__main__":
@@ -1,9 +1,11 @@
+import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
-from app.routes import router
+from app.orjson_response import ORJSONResponse
+from app.routes import router, register_exception_handlers
 
 
 @asynccontextmanager
@@ -25,25 +27,40 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    # 应用级默认响应类也使用 orjson，之后挂载的路由无需再各自指定
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
+# 允许的前端来源: CORS_ORIGINS 设为逗号分隔的具体列表时只放行这些来源（不再逐个回显请求的 Origin），
+# 未设置时与之前一样允许所有来源
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "*").split(",") if origin.strip()]
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,  # 浏览器缓存预检（OPTIONS）结果 24 小时，期间不再重复预检
 )
 
 app.include_router(router)
+register_exception_handlers(app)
 
 
 if __name__ == "__main__":
+    # RELOAD=1（默认）为开发模式: 单进程 + 代码热重载；RELOAD=0 时按 WORKERS 启动多个工作进程。
+    # 注意工作流注册表保存在进程内存中，多个 worker 之间不共享，
+    # 创建的工作流只存在于处理该请求的进程里，因此 WORKERS 默认仍为 1
+    reload = os.getenv("RELOAD", "1") == "1"
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=reload,
+        workers=None if reload else int(os.getenv("WORKERS", "1")),
+        # loop/http 保持默认的 "auto": 安装了 uvicorn[standard] 时自动使用 uvloop 事件循环和 httptools 解析器，
+        # 未安装时退回 asyncio + h11，服务仍能正常启动
         log_level="info"
     )
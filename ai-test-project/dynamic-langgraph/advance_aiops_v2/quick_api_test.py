@@ -4,14 +4,26 @@ Quick API Test Script
 
 A simple script to quickly test all API endpoints.
 Run: python quick_api_test.py
+     python quick_api_test.py --only history,logs   # run selected tests only
 """
 
+import argparse
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any
 
 BASE_URL = "http://localhost:8000"
+TIMEOUT = 5  # seconds, for the quick read/write endpoints
+EXECUTE_TIMEOUT = 120  # workflow execution may call slow backends
+
+# One pooled session for all tests: keep-alive reuses the TCP connection
+# instead of opening a new one per request
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
 
 class Colors:
     """ANSI color codes"""
@@ -23,26 +35,71 @@ class Colors:
     BOLD = '\033[1m'
 
 
+# Output formats are built once from the color codes; the print helpers only fill in the text
+SEP = "=" * 60
+HEADER_FMT = f"\n{Colors.BOLD}{Colors.BLUE}{SEP}{Colors.RESET}\n{Colors.BOLD}{Colors.BLUE}{{}}{Colors.RESET}\n{Colors.BOLD}{Colors.BLUE}{SEP}{Colors.RESET}\n"
+SUCCESS_FMT = f"{Colors.GREEN}✅ {{}}{Colors.RESET}"
+ERROR_FMT = f"{Colors.RED}❌ {{}}{Colors.RESET}"
+INFO_FMT = f"{Colors.YELLOW}ℹ️  {{}}{Colors.RESET}"
+
+
+# Tests running in worker threads buffer their output here, so the report of
+# each parallel test is printed in one piece instead of interleaved
+_output = threading.local()
+
+
+def _emit(text: str):
+    """Print a line, or buffer it when running inside run_parallel"""
+    buffer = getattr(_output, "buffer", None)
+    if buffer is None:
+        print(text)
+    else:
+        buffer.append(text)
+
+
 def print_header(text: str):
     """Print section header"""
-    print(f"\n{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.RESET}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{text}{Colors.RESET}")
-    print(f"{Colors.BOLD}{Colors.BLUE}{'='*60}{Colors.RESET}\n")
+    _emit(HEADER_FMT.format(text))
 
 
 def print_success(text: str):
     """Print success message"""
-    print(f"{Colors.GREEN}✅ {text}{Colors.RESET}")
+    _emit(SUCCESS_FMT.format(text))
 
 
 def print_error(text: str):
     """Print error message"""
-    print(f"{Colors.RED}❌ {text}{Colors.RESET}")
+    _emit(ERROR_FMT.format(text))
 
 
 def print_info(text: str):
     """Print info message"""
-    print(f"{Colors.YELLOW}ℹ️  {text}{Colors.RESET}")
+    _emit(INFO_FMT.format(text))
+
+
+def _run_buffered(test, workflow_id: str):
+    """Run one test in a worker thread, returning (passed, buffered output)"""
+    _output.buffer = []
+    try:
+        return test(workflow_id), _output.buffer
+    finally:
+        _output.buffer = None
+
+
+def run_parallel(tests, workflow_id: str) -> list:
+    """
+    Run independent read-only tests concurrently (I/O bound, so threads suffice)
+    and print their reports in submission order. Returns the pass/fail results.
+    """
+    with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+        futures = [executor.submit(_run_buffered, test, workflow_id) for test in tests]
+        results = []
+        for future in futures:
+            passed, lines = future.result()
+            for line in lines:
+                print(line)
+            results.append(passed)
+    return results
 
 
 def api_info_test():
@@ -50,7 +107,7 @@ def api_info_test():
     print_header("Test 1: Get API Info")
     
     try:
-        response = requests.get(f"{BASE_URL}/")
+        response = SESSION.get(f"{BASE_URL}/", timeout=TIMEOUT)
         if response.status_code == 200:
             data = response.json()
             print_success(f"API is running: {data['name']}")
@@ -108,7 +165,7 @@ def create_workflow() -> str:
     }
     
     try:
-        response = requests.post(f"{BASE_URL}/workflows", json=payload)
+        response = SESSION.post(f"{BASE_URL}/workflows", json=payload, timeout=TIMEOUT)
         if response.status_code == 200:
             data = response.json()
             print_success(f"Workflow created: {data['workflow_id']}")
@@ -127,7 +184,7 @@ def list_workflows() -> bool:
     print_header("Test 3: List Workflows")
     
     try:
-        response = requests.get(f"{BASE_URL}/workflows")
+        response = SESSION.get(f"{BASE_URL}/workflows", timeout=TIMEOUT)
         if response.status_code == 200:
             data = response.json()
             print_success(f"Total workflows: {data['total']}")
@@ -147,7 +204,7 @@ def get_workflow(workflow_id: str) -> bool:
     print_header(f"Test 4: Get Workflow Details: {workflow_id}")
     
     try:
-        response = requests.get(f"{BASE_URL}/workflows/{workflow_id}")
+        response = SESSION.get(f"{BASE_URL}/workflows/{workflow_id}", timeout=TIMEOUT)
         if response.status_code == 200:
             data = response.json()
             print_success(f"Workflow: {data['workflow_id']}")
@@ -174,9 +231,10 @@ def execute_workflow(workflow_id: str) -> bool:
     }
     
     try:
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/workflows/{workflow_id}/execute",
-            json=payload
+            json=payload,
+            timeout=EXECUTE_TIMEOUT
         )
         if response.status_code == 200:
             data = response.json()
@@ -191,12 +249,56 @@ def execute_workflow(workflow_id: str) -> bool:
         return False
 
 
+def batch_execute_workflow(workflow_id: str, count: int = 3) -> bool:
+    """Test: POST /workflows/batch-execute (timed against the same number of single calls)"""
+    print_header(f"Test 10: Batch Execute Workflow: {workflow_id}")
+    
+    payloads = [
+        {"workflow_id": workflow_id, "input_data": {"input": f"Batch query {i}"}}
+        for i in range(count)
+    ]
+    
+    try:
+        start = time.perf_counter()
+        for payload in payloads:
+            SESSION.post(
+                f"{BASE_URL}/workflows/{workflow_id}/execute",
+                json=payload,
+                timeout=EXECUTE_TIMEOUT
+            ).raise_for_status()
+        single_ms = (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        response = SESSION.post(
+            f"{BASE_URL}/workflows/batch-execute",
+            json=payloads,
+            timeout=EXECUTE_TIMEOUT
+        )
+        batch_ms = (time.perf_counter() - start) * 1000
+        
+        if response.status_code == 200:
+            data = response.json()
+            failed = [r for r in data['results'] if r['status'] != 'success']
+            if data['total'] != count or failed:
+                print_error(f"Batch results: {data['total']} total, {len(failed)} failed")
+                return False
+            print_success(f"Batch of {count} executed successfully")
+            print_info(f"{count} single calls: {single_ms:.2f}ms, 1 batch call: {batch_ms:.2f}ms")
+            return True
+        else:
+            print_error(f"Failed: {response.text}")
+            return False
+    except Exception as e:
+        print_error(f"Error: {e}")
+        return False
+
+
 def get_operator_logs(workflow_id: str) -> bool:
     """Test: GET /workflows/{workflow_id}/operator-logs"""
     print_header(f"Test 6: Get Operator Logs: {workflow_id}")
     
     try:
-        response = requests.get(f"{BASE_URL}/workflows/{workflow_id}/operator-logs")
+        response = SESSION.get(f"{BASE_URL}/workflows/{workflow_id}/operator-logs", timeout=TIMEOUT)
         if response.status_code == 200:
             data = response.json()
             print_success(f"Operator logs retrieved")
@@ -217,8 +319,9 @@ def get_execution_history(workflow_id: str) -> bool:
     print_header(f"Test 7: Get Execution History: {workflow_id}")
     
     try:
-        response = requests.get(
-            f"{BASE_URL}/workflows/{workflow_id}/execution-history"
+        response = SESSION.get(
+            f"{BASE_URL}/workflows/{workflow_id}/execution-history",
+            timeout=TIMEOUT
         )
         if response.status_code == 200:
             data = response.json()
@@ -240,7 +343,7 @@ def get_workflow_logs(workflow_id: str) -> bool:
     print_header(f"Test 8: Get Complete Logs: {workflow_id}")
     
     try:
-        response = requests.get(f"{BASE_URL}/workflows/{workflow_id}/logs")
+        response = SESSION.get(f"{BASE_URL}/workflows/{workflow_id}/logs", timeout=TIMEOUT)
         if response.status_code == 200:
             data = response.json()
             print_success("Complete logs retrieved")
@@ -260,7 +363,7 @@ def delete_workflow(workflow_id: str) -> bool:
     print_header(f"Test 9: Delete Workflow: {workflow_id}")
     
     try:
-        response = requests.delete(f"{BASE_URL}/workflows/{workflow_id}")
+        response = SESSION.delete(f"{BASE_URL}/workflows/{workflow_id}", timeout=TIMEOUT)
         if response.status_code == 200:
             data = response.json()
             print_success("Workflow deleted successfully")
@@ -273,62 +376,86 @@ def delete_workflow(workflow_id: str) -> bool:
         return False
 
 
-def main():
-    """Run all tests"""
+# Test names accepted by --only, in execution order
+TEST_NAMES = ["info", "create", "execute", "list", "get", "operator-logs", "history", "logs", "batch", "delete"]
+
+# Read-only tests, run concurrently after create/execute
+READ_ONLY_TESTS = {
+    "list": lambda _: list_workflows(),  # Test 3
+    "get": get_workflow,                 # Test 4
+    "operator-logs": get_operator_logs,  # Test 6
+    "history": get_execution_history,    # Test 7
+    "logs": get_workflow_logs,           # Test 8
+}
+
+# Tests that need a workflow: selecting any of them also runs create (setup) and delete (cleanup)
+NEEDS_WORKFLOW = {"execute", "get", "operator-logs", "history", "logs", "batch", "delete"}
+
+
+def parse_only(value: str) -> list:
+    """argparse type for --only: comma separated test names"""
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in TEST_NAMES]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown test(s): {', '.join(unknown)} (choose from {', '.join(TEST_NAMES)})"
+        )
+    return names
+
+
+def main(only: list = None):
+    """Run all tests, or only the selected ones"""
     print("\n")
     print_header("🚀 API Quick Test Suite")
     
+    selected = set(only or TEST_NAMES)
+    if selected & NEEDS_WORKFLOW:
+        selected |= {"create", "delete"}
+    
     tests_passed = 0
     tests_total = 0
     
     # Test 1: API Info
-    tests_total += 1
-    if api_info_test():
-        tests_passed += 1
+    if "info" in selected:
+        tests_total += 1
+        if api_info_test():
+            tests_passed += 1
     
     # Test 2: Create Workflow
-    tests_total += 1
-    workflow_id = create_workflow()
-    if workflow_id:
-        tests_passed += 1
-    else:
-        print_error("Cannot continue without workflow")
-        return
-    
-    # Test 3: List Workflows
-    tests_total += 1
-    if list_workflows():
-        tests_passed += 1
-    
-    # Test 4: Get Workflow
-    tests_total += 1
-    if get_workflow(workflow_id):
-        tests_passed += 1
-    
-    # Test 5: Execute Workflow
-    tests_total += 1
-    if execute_workflow(workflow_id):
-        tests_passed += 1
+    workflow_id = None
+    if "create" in selected:
+        tests_total += 1
+        workflow_id = create_workflow()
+        if workflow_id:
+            tests_passed += 1
+        else:
+            print_error("Cannot continue without workflow")
+            return
     
-    # Test 6: Get Operator Logs
-    tests_total += 1
-    if get_operator_logs(workflow_id):
-        tests_passed += 1
+    # Test 5: Execute Workflow (only when selected; the read-only tests don't need it to pass)
+    if "execute" in selected:
+        tests_total += 1
+        if execute_workflow(workflow_id):
+            tests_passed += 1
     
-    # Test 7: Get Execution History
-    tests_total += 1
-    if get_execution_history(workflow_id):
-        tests_passed += 1
+    # Tests 3, 4, 6, 7, 8 are read-only and independent: run them concurrently
+    read_only_tests = [test for name, test in READ_ONLY_TESTS.items() if name in selected]
+    if read_only_tests:
+        results = run_parallel(read_only_tests, workflow_id)
+        tests_total += len(results)
+        tests_passed += sum(results)
     
-    # Test 8: Get Complete Logs
-    tests_total += 1
-    if get_workflow_logs(workflow_id):
-        tests_passed += 1
+    # Test 10: Batch Execute (runs after the read-only tests so their history counts stay the same)
+    if "batch" in selected:
+        tests_total += 1
+        if batch_execute_workflow(workflow_id):
+            tests_passed += 1
     
     # Test 9: Delete Workflow
-    tests_total += 1
-    if delete_workflow(workflow_id):
-        tests_passed += 1
+    if "delete" in selected:
+        tests_total += 1
+        if delete_workflow(workflow_id):
+            tests_passed += 1
     
     # Summary
     print_header("📊 Test Results")
@@ -341,8 +468,18 @@ def main():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quickly test all API endpoints")
+    parser.add_argument(
+        "--only",
+        type=parse_only,
+        metavar="TEST[,TEST...]",
+        help=f"run only these tests ({', '.join(TEST_NAMES)})"
+    )
+    args = parser.parse_args()
+    
     try:
-        main()
+        with SESSION:
+            main(args.only)
     except KeyboardInterrupt:
         print(f"\n{Colors.YELLOW}Test interrupted by user{Colors.RESET}")
     except Exception as e:
@@ -132,6 +132,16 @@ class TestStateFieldSchema:
             description="List of items"
         )
         assert field.type == "List[str]"
+    
+    def test_of_interning(self):
+        """测试 of() 复用相同内容的实例，相等但类型不同的默认值不共用实例"""
+        assert StateFieldSchema.of("str", "", "Data") is StateFieldSchema.of("str", "", "Data")
+        
+        int_field = StateFieldSchema.of("float", 1)
+        float_field = StateFieldSchema.of("float", 1.0)
+        assert int_field is not float_field
+        assert type(float_field.default) is float
+        assert StateFieldSchema.of("int", False).default is False
 
 
 class TestWorkflowRegistry:
@@ -251,6 +261,87 @@ class TestWorkflowRegistry:
         assert f"workflow_1" in workflows
         assert f"workflow_2" in workflows
     
+    def test_register_workflows(self):
+        """测试批量注册：按顺序返回 ID，任一定义不合法时一个都不注册"""
+        registry = WorkflowRegistry()
+        
+        def make_def(workflow_id: str, entry_point: str = "node") -> WorkflowDefinition:
+            return WorkflowDefinition(
+                workflow_id=workflow_id,
+                nodes=[
+                    NodeDefinition(
+                        name="node",
+                        type=NodeType.Planner,
+                        config={
+                            "graph_db_name": "db",
+                            "event_name": "event"
+                        }
+                    )
+                ],
+                edges=[],
+                entry_point=entry_point,
+                state_schema={
+                    "data": StateFieldSchema(type="str", default="", description="Data")
+                }
+            )
+        
+        with pytest.raises(ValueError):
+            registry.register_workflows([make_def("batch_ok"), make_def("batch_bad", entry_point="missing")])
+        assert registry.list_workflows() == []
+        
+        # 构建阶段失败（LLM 节点尚未实现）时，本次已注册的和失败的工作流都不会留在注册表中
+        unbuildable = make_def("batch_llm")
+        unbuildable.nodes.append(NodeDefinition(name="llm", type=NodeType.LLM))
+        with pytest.raises(NotImplementedError):
+            registry.register_workflows([make_def("batch_ok"), unbuildable])
+        assert registry.list_workflows() == []
+        assert registry.get_workflow_definition("batch_ok") is None
+        assert registry.get_workflow_definition("batch_llm") is None
+        
+        workflow_ids = registry.register_workflows(make_def(f"batch_{i}") for i in range(3))
+        assert workflow_ids == ["batch_0", "batch_1", "batch_2"]
+        assert registry.list_workflows() == workflow_ids
+    
+    def test_register_workflows_rollback_keeps_existing(self):
+        """测试批量注册失败时，被覆盖的已有工作流恢复为原来的版本"""
+        registry = WorkflowRegistry()
+        
+        def make_def(workflow_id: str, event_name: str = "event") -> WorkflowDefinition:
+            return WorkflowDefinition(
+                workflow_id=workflow_id,
+                nodes=[
+                    NodeDefinition(
+                        name="node",
+                        type=NodeType.Planner,
+                        config={
+                            "graph_db_name": "db",
+                            "event_name": event_name
+                        }
+                    )
+                ],
+                edges=[],
+                entry_point="node",
+                state_schema={
+                    "data": StateFieldSchema(type="str", default="", description="Data")
+                }
+            )
+        
+        original = make_def("a")
+        registry.register_workflow(original)
+        original_graph = registry.get_workflow("a")
+        original_node = registry.get_node_by_name("a", "node")
+        
+        unbuildable = make_def("b")
+        unbuildable.nodes.append(NodeDefinition(name="llm", type=NodeType.LLM))
+        with pytest.raises(NotImplementedError):
+            registry.register_workflows([make_def("a", event_name="replaced"), unbuildable])
+        
+        assert registry.list_workflows() == ["a"]
+        assert registry.get_workflow("a") is original_graph
+        assert registry.get_workflow_definition("a") is original
+        assert registry.get_node_by_name("a", "node") is original_node
+        assert registry.execute_workflow("a", {"data": "x"}) is not None
+    
     def test_workflow_unregister(self):
         """测试工作流注销"""
         registry = WorkflowRegistry()
@@ -279,6 +370,8 @@ class TestWorkflowRegistry:
         
         registry.unregister_workflow("temp_workflow")
         assert not registry.has_workflow("temp_workflow")
+        assert registry.get_workflow_definition("temp_workflow") is None
+        assert registry.get_node_by_name("temp_workflow", "node") is None
     
     def test_registry_stats(self):
         """测试注册表统计"""
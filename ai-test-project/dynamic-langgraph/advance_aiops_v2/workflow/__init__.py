@@ -18,19 +18,32 @@ from .models import (
     WorkflowDefinition,
 )
 
-from .base_node import (
-    BaseNode,
-    PlannerNode,
-    WorkerNode,
-    ReflectionNode,
-    AgentNode,
-    create_node,
-)
+import importlib
 
-from .graph_builder import (
-    GraphBuilder,
-    WorkflowRegistry,
-)
+# 节点与图构建模块会引入 LangGraph/LangChain，导入耗时较长，改为首次访问时再加载（PEP 562）；
+# 只用到模型的代码（如 from workflow import NodeType）不再付出这部分开销
+_LAZY_IMPORTS = {
+    "BaseNode": ".base_node",
+    "PlannerNode": ".base_node",
+    "WorkerNode": ".base_node",
+    "ReflectionNode": ".base_node",
+    "AgentNode": ".base_node",
+    "create_node": ".base_node",
+    "GraphBuilder": ".graph_builder",
+    "WorkflowRegistry": ".graph_builder",
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value  # 缓存到模块命名空间，之后的访问不再经过 __getattr__
+    return value
+
+
+def __dir__():
+    return __all__
 
 __all__ = [
     # Models
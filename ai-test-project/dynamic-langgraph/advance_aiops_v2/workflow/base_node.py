@@ -7,6 +7,9 @@ from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional, Callable, Type
 from langchain_core.runnables import Runnable, RunnableLambda
 from pydantic import BaseModel
+from collections import deque
+from itertools import islice
+from dataclasses import replace
 import time
 from .models import (
     NodeType, NodeDefinition, ExecutionLog, OperatorLog, 
@@ -14,6 +17,15 @@ from .models import (
 )
 
 
+# 每个节点默认最多保留的执行日志条数（环形缓冲，超出后丢弃最旧的）
+MAX_EXECUTION_HISTORY = 1000
+
+# 执行日志的保存模式:
+# - full: 完整保存输入输出数据
+# - summary: 只保留节点名、类型、时间、耗时、错误等摘要信息，丢弃体积较大的 input_data/output_data
+HISTORY_MODES = ("full", "summary")
+
+
 # --- 工具函数 ---
 
 def convert_state_to_dict(state: Any) -> Dict[str, Any]:
@@ -100,7 +112,10 @@ class BaseNode(ABC):
         self.node_type = node_type
         self.config = config
         self.operator_log = operator_log
-        self._execution_history: list[ExecutionLog] = []
+        self._execution_history: deque[ExecutionLog] = deque(maxlen=MAX_EXECUTION_HISTORY)
+        self.history_mode = "full"
+        # 执行日志回调: 注册表在注册工作流时设置，每条日志写入时同步追加到工作流的执行历史
+        self.on_log: Optional[Callable[[ExecutionLog], None]] = None
     
     @abstractmethod
     def build_runnable(self) -> Runnable:
@@ -126,13 +141,38 @@ class BaseNode(ABC):
         """
         pass
     
-    def get_execution_history(self) -> list[ExecutionLog]:
-        """获取节点的执行历史"""
-        return self._execution_history.copy()
+    def configure_history(self, max_history: int, history_mode: str) -> None:
+        """
+        设置执行日志的保存方式
+        
+        Args:
+            max_history: 最多保留的日志条数
+            history_mode: 保存模式，见 HISTORY_MODES
+        """
+        self._execution_history = deque(self._execution_history, maxlen=max_history)
+        self.history_mode = history_mode
+    
+    def get_execution_history(self, limit: Optional[int] = None) -> list[ExecutionLog]:
+        """
+        获取节点的执行历史（按时间顺序）
+        
+        Args:
+            limit: 只取最近的若干条，None 表示全部
+        """
+        if limit is None:
+            return list(self._execution_history)
+        # 日志按时间顺序追加，最近的在队尾: 从队尾倒着取，不遍历更早的日志
+        recent = list(islice(reversed(self._execution_history), limit))
+        recent.reverse()
+        return recent
     
     def log_execution(self, execution_log: ExecutionLog) -> None:
         """记录一次执行日志"""
+        if self.history_mode == "summary":
+            execution_log = replace(execution_log, input_data={}, output_data={})
         self._execution_history.append(execution_log)
+        if self.on_log is not None:
+            self.on_log(execution_log)
     
     def clear_execution_history(self) -> None:
         """清除执行历史"""
@@ -412,6 +452,17 @@ class AgentNode(BaseNode):
 
 # --- 节点工厂函数 ---
 
+# 节点类型 → 节点类（构造参数相同的类型），create_node 按字典查找分派，不再逐个比较
+_NODE_CLASSES: Dict[NodeType, Type[BaseNode]] = {
+    NodeType.Planner: PlannerNode,
+    NodeType.Worker: WorkerNode,
+    NodeType.Reflection: ReflectionNode,
+}
+
+# 已定义但尚未实现的节点类型
+_UNIMPLEMENTED_NODE_TYPES = frozenset({NodeType.LLM, NodeType.Tool})
+
+
 def create_node(
     definition: NodeDefinition,
     operator_log: Optional[OperatorLog] = None,
@@ -421,6 +472,10 @@ def create_node(
     统一的节点工厂函数
     根据节点定义创建对应的节点实例
     
+    每次调用都新建实例，不按 (名称, 类型, 配置) 缓存复用: 节点对象保存着自己的执行历史和
+    指向所属工作流执行历史的 on_log 回调，两个工作流中同名同配置的节点若共用一个实例，
+    日志会相互混入；节点也只在注册工作流时创建一次，之后每次执行复用编译好的图
+    
     Args:
         definition: 节点定义
         operator_log: 操作符日志
@@ -442,17 +497,12 @@ def create_node(
             output_schema={}
         )
     
-    if node_type == NodeType.Planner:
-        return PlannerNode(definition.name, definition.config, operator_log)
-    elif node_type == NodeType.Worker:
-        return WorkerNode(definition.name, definition.config, operator_log)
-    elif node_type == NodeType.Reflection:
-        return ReflectionNode(definition.name, definition.config, operator_log)
-    elif node_type == NodeType.Agent:
+    node_class = _NODE_CLASSES.get(node_type)
+    if node_class is not None:
+        return node_class(definition.name, definition.config, operator_log)
+    if node_type == NodeType.Agent:
+        # Agent 节点额外需要工作流注册表
         return AgentNode(definition.name, definition.config, operator_log, workflow_registry)
-    elif node_type == NodeType.LLM:
+    if node_type in _UNIMPLEMENTED_NODE_TYPES:
         raise NotImplementedError(f"Node type '{node_type}' is not yet implemented")
-    elif node_type == NodeType.Tool:
-        raise NotImplementedError(f"Node type '{node_type}' is not yet implemented")
-    else:
-        raise ValueError(f"Unknown node type: {node_type}")
+    raise ValueError(f"Unknown node type: {node_type}")
@@ -4,16 +4,18 @@
 支持普通边和条件边的自动处理
 """
 
-from typing import Dict, Any, Callable, Optional, Type
+from typing import Dict, Any, Callable, Deque, Iterable, Iterator, Optional, Type
 from pydantic import create_model, BaseModel, Field
 from langgraph.graph import StateGraph, END
 import logging
+from collections import deque
+from itertools import islice
 
 from .models import (
     WorkflowDefinition, NodeDefinition, EdgeDefinition, StateFieldSchema,
     OperatorLog, NodeType, ExecutionLog
 )
-from .base_node import BaseNode, create_node
+from .base_node import BaseNode, create_node, MAX_EXECUTION_HISTORY, HISTORY_MODES
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +31,9 @@ def auto_generate_operator_logs(definition: WorkflowDefinition) -> None:
     if not definition.operator_logs:
         definition.operator_logs = {}
     
+    # 默认 schema 内容固定，通过 StateFieldSchema.of() 复用驻留池中的实例，
+    # 多个工作流（包括经 API 创建的）的同名字段共享同一个对象
+    
     # 为每个节点生成 operator_log（如果还没有的话）
     for node_def in definition.nodes:
         if node_def.name not in definition.operator_logs:
@@ -38,11 +43,11 @@ def auto_generate_operator_logs(definition: WorkflowDefinition) -> None:
                 op_log = OperatorLog(
                     node_name=node_def.name,
                     input_schema={
-                        "input": StateFieldSchema(type="str", description="输入查询")
+                        "input": StateFieldSchema.of("str", description="输入查询")
                     },
                     output_schema={
-                        "plan": StateFieldSchema(type="str", description="规划结果"),
-                        "status": StateFieldSchema(type="str", description="状态")
+                        "plan": StateFieldSchema.of("str", description="规划结果"),
+                        "status": StateFieldSchema.of("str", description="状态")
                     }
                 )
             elif node_def.type == NodeType.Worker:
@@ -50,10 +55,10 @@ def auto_generate_operator_logs(definition: WorkflowDefinition) -> None:
                 op_log = OperatorLog(
                     node_name=node_def.name,
                     input_schema={
-                        "plan": StateFieldSchema(type="str", description="输入计划")
+                        "plan": StateFieldSchema.of("str", description="输入计划")
                     },
                     output_schema={
-                        "result": StateFieldSchema(type="str", description="执行结果")
+                        "result": StateFieldSchema.of("str", description="执行结果")
                     }
                 )
             elif node_def.type == NodeType.Reflection:
@@ -61,11 +66,11 @@ def auto_generate_operator_logs(definition: WorkflowDefinition) -> None:
                 op_log = OperatorLog(
                     node_name=node_def.name,
                     input_schema={
-                        "result": StateFieldSchema(type="str", description="输入结果")
+                        "result": StateFieldSchema.of("str", description="输入结果")
                     },
                     output_schema={
-                        "reflection": StateFieldSchema(type="str", description="反思结果"),
-                        "status": StateFieldSchema(type="str", description="状态")
+                        "reflection": StateFieldSchema.of("str", description="反思结果"),
+                        "status": StateFieldSchema.of("str", description="状态")
                     }
                 )
             elif node_def.type == NodeType.Agent:
@@ -73,10 +78,10 @@ def auto_generate_operator_logs(definition: WorkflowDefinition) -> None:
                 op_log = OperatorLog(
                     node_name=node_def.name,
                     input_schema={
-                        "input": StateFieldSchema(type="str", description="输入")
+                        "input": StateFieldSchema.of("str", description="输入")
                     },
                     output_schema={
-                        "output": StateFieldSchema(type="str", description="输出")
+                        "output": StateFieldSchema.of("str", description="输出")
                     }
                 )
             else:
@@ -110,12 +115,13 @@ class GraphBuilder:
         """设置父级WorkflowRegistry，用于Agent节点查询已注册的工作流"""
         self._parent_registry = parent_registry
     
-    def build_graph(self, definition: WorkflowDefinition) -> Any:
+    def build_graph(self, definition: WorkflowDefinition, validate: bool = True) -> Any:
         """
         根据工作流定义构建 LangGraph
         
         Args:
             definition: 工作流定义
+            validate: 是否先校验定义；批量注册时已统一校验过，传 False 跳过重复校验
             
         Returns:
             编译后的 LangGraph
@@ -126,7 +132,8 @@ class GraphBuilder:
         logger.info(f"Building workflow: {definition.workflow_id}")
         
         # 1. 验证工作流定义
-        self._validate_definition(definition)
+        if validate:
+            self._validate_definition(definition)
         
         # 2. 创建动态状态模型
         state_model = self._create_state_model(definition.state_schema)
@@ -137,11 +144,7 @@ class GraphBuilder:
         # 4. 创建所有节点并添加到图中
         nodes_map = self._add_nodes_to_graph(graph, definition)
         
-        # 保存节点引用到注册表（便于后续查询执行日志）
-        if self._parent_registry:
-            self._parent_registry._nodes_map[definition.workflow_id] = nodes_map
-        
-        # 5. 添加边
+        # 5. 添加边（边列表只在注册时遍历这一次；执行时直接运行编译好的图，不再扫描边）
         self._add_edges_to_graph(graph, definition, nodes_map)
         
         # 6. 设置入口点
@@ -150,6 +153,10 @@ class GraphBuilder:
         # 7. 编译图
         compiled_graph = graph.compile()
         
+        # 保存节点引用到注册表（便于后续查询执行日志）；放在编译成功之后，构建失败时不留下节点
+        if self._parent_registry:
+            self._parent_registry._nodes_map[definition.workflow_id] = nodes_map
+        
         logger.info(f"Workflow '{definition.workflow_id}' built successfully")
         
         return compiled_graph
@@ -172,13 +179,14 @@ class GraphBuilder:
                 f"Workflow '{definition.workflow_id}': entry_point '{definition.entry_point}' not found in nodes"
             )
         
-        # 验证所有边的源和目标存在
+        # 验证所有边的源和目标存在（节点名加上 "END" 预先合成一个集合，每条边只做集合查找）
+        endpoints = node_names | {"END"}
         for edge in definition.edges:
-            if edge.source not in node_names and edge.source != "END":
+            if edge.source not in endpoints:
                 raise ValueError(
                     f"Workflow '{definition.workflow_id}': edge source '{edge.source}' not found in nodes"
                 )
-            if edge.target not in node_names and edge.target != "END":
+            if edge.target not in endpoints:
                 raise ValueError(
                     f"Workflow '{definition.workflow_id}': edge target '{edge.target}' not found in nodes"
                 )
@@ -356,22 +364,23 @@ class GraphBuilder:
             target: 目标节点（可以是节点名称或 END）
             condition_key: 条件路由键名
         """
+        # 条件值为空时的默认路由在构建图时确定，执行时不再判断
+        default_route = target if isinstance(target, str) else "END"
+        
         def router_func(state: Any) -> str:
             """
             路由函数：根据状态中的条件键确定下一个节点
             """
-            # 将 Pydantic 模型转换为字典
-            if hasattr(state, 'model_dump'):
-                state_dict = state.model_dump()
+            # 只读取条件键这一个字段（状态是 Pydantic 模型时直接取属性），
+            # 不再在每次状态流转时把整个状态 model_dump 成字典
+            if isinstance(state, dict):
+                condition_value = state.get(condition_key)
             else:
-                state_dict = state
-            
-            # 获取条件值
-            condition_value = state_dict.get(condition_key)
+                condition_value = getattr(state, condition_key, None)
             
             # 如果条件值为 None 或空，返回原始目标
             if condition_value is None:
-                return target if isinstance(target, str) else "END"
+                return default_route
             
             # 如果条件值匹配目标节点名称或是一个有效的路由值
             # 这里可以扩展更复杂的路由逻辑
@@ -391,13 +400,27 @@ class WorkflowRegistry:
     """
     工作流注册表
     管理已编译的工作流，支持存储、加载和执行
+
+    工作流在 register_workflow 中即构建并编译（提前编译），执行时只取编译结果，
+    第一个执行请求不会承担编译开销；因此没有单独的 precompile 预热入口
     """
     
-    def __init__(self):
-        """初始化注册表"""
+    def __init__(self, max_history: int = MAX_EXECUTION_HISTORY, history_mode: str = "full"):
+        """
+        初始化注册表
+        
+        Args:
+            max_history: 每个工作流（以及每个节点）最多保留的执行日志条数，超出后丢弃最旧的
+            history_mode: 执行日志保存模式，"full" 保存完整输入输出，"summary" 只保存摘要
+        """
+        if history_mode not in HISTORY_MODES:
+            raise ValueError(f"history_mode must be one of {HISTORY_MODES}, got '{history_mode}'")
+        self.max_history = max_history
+        self.history_mode = history_mode
         self._registry: Dict[str, Any] = {}
         self._definitions: Dict[str, WorkflowDefinition] = {}  # 存储工作流定义
         self._nodes_map: Dict[str, Dict[str, BaseNode]] = {}  # 存储每个工作流的节点
+        self._versions: Dict[str, int] = {}  # 每个工作流的版本号，注册/移除时递增，供上层缓存判断是否失效
         self._graph_builder = GraphBuilder(self._registry)
         self._graph_builder.set_parent_registry(self)
     
@@ -411,21 +434,89 @@ class WorkflowRegistry:
         Returns:
             工作流 ID
         """
+        workflow_id = self._register(definition)
+        logger.info(f"Workflow '{workflow_id}' registered successfully")
+        return workflow_id
+    
+    def _register(self, definition: WorkflowDefinition, validated: bool = False) -> str:
+        """注册单个工作流（不输出成功日志）；validated 为 True 时表示定义已校验过"""
         try:
             # 自动为没有 operator_logs 的节点生成默认值
             auto_generate_operator_logs(definition)
             
-            # 保存工作流定义
-            self._definitions[definition.workflow_id] = definition
+            # 节点名列表、边数只在注册时计算一次，之后的查询直接读取
+            definition.index_nodes()
+            
+            # 图只在注册时构建、编译一次，之后每次执行直接复用编译结果
+            compiled_graph = self._graph_builder.build_graph(definition, validate=not validated)
             
-            compiled_graph = self._graph_builder.build_graph(definition)
+            # 构建成功后才保存定义和编译结果，构建失败时注册表里不会留下只注册了一半的工作流
+            self._definitions[definition.workflow_id] = definition
             self._registry[definition.workflow_id] = compiled_graph
-            logger.info(f"Workflow '{definition.workflow_id}' registered successfully")
+            self._bump_version(definition.workflow_id)
+            
+            # 执行历史使用定长环形缓冲，长期运行的服务内存占用有上限
+            definition.execution_history = deque(definition.execution_history, maxlen=self.max_history)
+            
+            # 节点写日志时直接追加到工作流的执行历史，执行结束后无需再汇总
+            for node in self._nodes_map.get(definition.workflow_id, {}).values():
+                node.configure_history(self.max_history, self.history_mode)
+                node.on_log = definition.execution_history.append
             return definition.workflow_id
         except Exception as e:
             logger.error(f"Failed to register workflow '{definition.workflow_id}': {e}")
             raise
     
+    def register_workflows(self, definitions: Iterable[WorkflowDefinition]) -> list[str]:
+        """
+        批量注册多个工作流
+        
+        先对全部定义做结构校验，任何一个不合法时直接报错、一个都不注册；
+        再按列表顺序逐个注册（已校验过，构建图时不再重复校验），全部完成后只输出一条日志。
+        某个工作流构建失败时回滚本次的注册后再抛出异常: 新增的工作流被移除，
+        覆盖了已有同 ID 工作流的恢复为原来的编译结果、定义和节点。
+        被 Agent 节点引用的工作流应排在引用它的工作流之前
+        
+        Args:
+            definitions: 工作流定义列表
+            
+        Returns:
+            工作流 ID 列表（与传入顺序一致）
+        """
+        definitions = list(definitions)
+        for definition in definitions:
+            self._graph_builder._validate_definition(definition)
+        # 注册前记下将被覆盖的已有工作流（编译结果、定义、节点），之前未注册过的记为 None
+        previous: Dict[str, Optional[tuple]] = {}
+        workflow_ids = []
+        try:
+            for definition in definitions:
+                workflow_id = definition.workflow_id
+                if workflow_id not in previous:
+                    previous[workflow_id] = (
+                        (self._registry[workflow_id], self._definitions.get(workflow_id),
+                         self._nodes_map.get(workflow_id))
+                        if workflow_id in self._registry else None
+                    )
+                workflow_ids.append(self._register(definition, validated=True))
+        except Exception:
+            for workflow_id in dict.fromkeys(workflow_ids):
+                self._restore(workflow_id, previous[workflow_id])
+            raise
+        logger.info(f"{len(workflow_ids)} workflows registered successfully: {workflow_ids}")
+        return workflow_ids
+    
+    def _restore(self, workflow_id: str, snapshot: Optional[tuple]) -> None:
+        """批量注册回滚时把工作流恢复为注册前的状态（snapshot 为 None 表示之前不存在）"""
+        if snapshot is None:
+            self.unregister_workflow(workflow_id)
+            return
+        compiled_graph, definition, nodes_map = snapshot
+        self._registry[workflow_id] = compiled_graph
+        self._definitions[workflow_id] = definition
+        self._nodes_map[workflow_id] = nodes_map
+        self._bump_version(workflow_id)
+    
     def get_workflow(self, workflow_id: str) -> Any:
         """
         获取已注册的工作流
@@ -462,11 +553,22 @@ class WorkflowRegistry:
             是否成功移除
         """
         if workflow_id in self._registry:
+            # 编译结果与定义、节点对象一起移除，之后的查询不会再返回已删除的工作流
             del self._registry[workflow_id]
+            self._definitions.pop(workflow_id, None)
+            self._nodes_map.pop(workflow_id, None)
+            self._bump_version(workflow_id)
             logger.info(f"Workflow '{workflow_id}' unregistered")
             return True
         return False
     
+    def get_version(self, workflow_id: str) -> int:
+        """获取工作流的版本号（从未注册过时为 0）"""
+        return self._versions.get(workflow_id, 0)
+    
+    def _bump_version(self, workflow_id: str) -> None:
+        self._versions[workflow_id] = self._versions.get(workflow_id, 0) + 1
+    
     def execute_workflow(self, workflow_id: str, input_data: Dict[str, Any]) -> Any:
         """
         执行一个工作流
@@ -484,10 +586,32 @@ class WorkflowRegistry:
         try:
             result = workflow.invoke(input_data)
             logger.info(f"Workflow '{workflow_id}' executed successfully")
+            # 执行日志已由各节点在运行时追加到工作流定义（见 register_workflow）
+            return result
+        except Exception as e:
+            logger.error(f"Workflow '{workflow_id}' execution failed: {e}")
+            raise
+    
+    async def aexecute_workflow(self, workflow_id: str, input_data: Dict[str, Any]) -> Any:
+        """
+        异步执行一个工作流（execute_workflow 的 async 版本）
+        
+        使用 LangGraph 的 ainvoke: 同一步中没有依赖关系的节点（分支扇出）并发执行，
+        同步节点由 LangGraph 放到线程池中运行，不阻塞调用方的事件循环
+        
+        Args:
+            workflow_id: 工作流 ID
+            input_data: 输入数据
             
-            # 收集所有节点的执行日志回工作流定义
-            self._collect_execution_logs(workflow_id)
-            
+        Returns:
+            执行结果
+        """
+        workflow = self.get_workflow(workflow_id)
+        logger.info(f"Executing workflow '{workflow_id}' (async)")
+        
+        try:
+            result = await workflow.ainvoke(input_data)
+            logger.info(f"Workflow '{workflow_id}' executed successfully")
             return result
         except Exception as e:
             logger.error(f"Workflow '{workflow_id}' execution failed: {e}")
@@ -500,31 +624,6 @@ class WorkflowRegistry:
             "workflow_ids": self.list_workflows()
         }
     
-    def _collect_execution_logs(self, workflow_id: str) -> None:
-        """
-        收集所有节点的执行日志並変新到工作流定义
-        
-        Args:
-            workflow_id: 工作流 ID
-        """
-        definition = self.get_workflow_definition(workflow_id)
-        if not definition:
-            return
-        
-        nodes_map = self._nodes_map.get(workflow_id, {})
-        execution_history = []
-        
-        # 收集每个节点的执行日志
-        for node_name, node in nodes_map.items():
-            node_logs = node.get_execution_history()
-            execution_history.extend(node_logs)
-        
-        # 按时间排序执行日志
-        execution_history.sort(key=lambda log: log.timestamp)
-        
-        # 更新工作流定义中的执行历史
-        definition.execution_history = execution_history
-    
     # --- 查询接口 ---
     
     def get_workflow_definition(self, workflow_id: str) -> Optional[WorkflowDefinition]:
@@ -569,7 +668,7 @@ class WorkflowRegistry:
         logs = self.get_operator_logs(workflow_id)
         return logs.get(node_name)
     
-    def get_execution_history(self, workflow_id: str) -> list[ExecutionLog]:
+    def get_execution_history(self, workflow_id: str) -> Deque[ExecutionLog]:
         """
         获取工作流的执行历史
         
@@ -577,27 +676,56 @@ class WorkflowRegistry:
             workflow_id: 工作流 ID
             
         Returns:
-            执行日志列表 [ExecutionLog]
+            执行日志队列 [ExecutionLog]（按时间顺序，最多保留 max_history 条；直接返回内部队列，不做复制）
         """
         definition = self.get_workflow_definition(workflow_id)
         if not definition:
             logger.warning(f"Workflow '{workflow_id}' not found")
-            return []
+            return deque()
         return definition.execution_history
     
-    def get_node_execution_history(self, workflow_id: str, node_name: str) -> list[ExecutionLog]:
+    def iter_execution_history(self, workflow_id: str, offset: int = 0,
+                               limit: Optional[int] = None) -> Iterator[ExecutionLog]:
+        """
+        按区间遍历工作流的执行历史（跳过前 offset 条，最多 limit 条），不复制整个队列
+        
+        直接迭代内部队列: 遍历期间若有新的执行写入日志会抛出 RuntimeError，
+        需要跨线程/跨 await 使用时请先转成列表
+        
+        Args:
+            workflow_id: 工作流 ID
+            offset: 跳过的条数
+            limit: 最多返回的条数，None 表示不限
+            
+        Returns:
+            执行日志迭代器（按时间顺序）
+        """
+        stop = None if limit is None else offset + limit
+        return islice(self.get_execution_history(workflow_id), offset, stop)
+    
+    def get_node_execution_history(self, workflow_id: str, node_name: str,
+                                   limit: Optional[int] = None) -> list[ExecutionLog]:
         """
         获取特定节点的执行历史
         
         Args:
             workflow_id: 工作流 ID
             node_name: 节点名称
+            limit: 只取最近的若干条（仍按时间顺序返回），None 表示全部
             
         Returns:
             特定节点的执行日志列表
+        
+        每个节点对象在写日志时已经保存了自己的执行历史（见 BaseNode.log_execution），
+        相当于按 (工作流, 节点名) 建好、按时间排序的索引: 直接取该节点的历史，不再扫描整个工作流的执行历史
         """
-        history = self.get_execution_history(workflow_id)
-        return [log for log in history if log.node_name == node_name]
+        if workflow_id not in self._definitions:
+            logger.warning(f"Workflow '{workflow_id}' not found")
+            return []
+        node = self.get_node_by_name(workflow_id, node_name)
+        if node is None:
+            return []
+        return node.get_execution_history(limit)
     
     def get_node_by_name(self, workflow_id: str, node_name: str) -> Optional[BaseNode]:
         """
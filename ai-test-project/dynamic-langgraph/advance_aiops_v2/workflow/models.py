@@ -1,10 +1,11 @@
-from pydantic import BaseModel, Field, create_model
-from typing import Dict, Any, List, Optional, Type, Callable, Literal
+from pydantic import BaseModel, Field, PlainSerializer, PrivateAttr, create_model
+from typing import Annotated, Dict, Any, ClassVar, Deque, List, Mapping, Optional, Tuple
 from enum import Enum
-from langchain_core.runnables import Runnable, RunnableLambda
-from langgraph.graph import StateGraph, END
+from collections import deque
+from types import MappingProxyType
+from weakref import WeakValueDictionary
+from dataclasses import dataclass, field
 from datetime import datetime
-import json
 
 
 # --- 工作流模型更新 ---
@@ -25,24 +26,62 @@ class WorkerSubType(str, Enum):
     RAG = "rag"
 
 
-class NodeDefinition(BaseModel):
-    name: str = Field(..., description="节点名称")
-    type: NodeType = Field(..., description="节点类型")
-    config: Dict[str, Any] = Field(default_factory=dict, description="节点的实例化配置")
+# 节点、边、状态字段是工作流定义中数量最多的小对象，使用 slots 数据类:
+# 构造开销和内存占用都比 BaseModel 小，支持按位置参数构造；注册后不再修改，均为 frozen；
+# 作为 WorkflowDefinition 的字段时仍由 pydantic 负责从字典校验构造
+# （没有改用 msgspec.Struct: 它单独构造更快，但 pydantic 无法把它作为字段类型校验，
+#  /operator-logs 依赖的 pydantic 嵌套 exclude 序列化也不会作用到 Struct 内部；
+#  这些对象只在注册时构造一次，数据类已足够）
+
+@dataclass(slots=True, frozen=True)
+class NodeDefinition:
+    name: str  # 节点名称
+    type: NodeType  # 节点类型
+    # 节点的实例化配置（构造后为只读视图，pydantic 序列化时还原为 dict）
+    config: Annotated[Mapping[str, Any], PlainSerializer(dict)] = field(default_factory=dict)
+
+    def __post_init__(self):
+        # 配置复制一份并包装为只读映射: 注册后无法再被修改，按注册表版本号缓存的详情 JSON 不会过期
+        if not isinstance(self.config, MappingProxyType):
+            object.__setattr__(self, "config", MappingProxyType(dict(self.config)))
+
+
+@dataclass(slots=True, frozen=True)
+class EdgeDefinition:
+    source: str  # 源节点名称
+    target: str  # 目标节点名称
+    condition: Optional[str] = None  # 条件路由键名
+
+
+@dataclass(slots=True, frozen=True, weakref_slot=True)
+class StateFieldSchema:
+    """
+    定义状态字段的 Schema
+
+    不可变（frozen），相同内容的实例可以在多个工作流/OperatorLog 之间共享，
+    通过 of() 构造时从驻留池中复用已有实例；驻留池只持有弱引用，
+    工作流被删除、实例不再被引用后会自动从池中移除，池的大小不会随历史注册无限增长
+    """
+    type: str  # 字段类型，例如: 'str', 'int', 'List[str]'
+    default: Any = None  # 字段默认值
+    description: str = ""  # 字段描述
+
+    _pool: ClassVar["WeakValueDictionary[tuple, StateFieldSchema]"] = WeakValueDictionary()
+
+    @classmethod
+    def of(cls, type: str, default: Any = None, description: str = "") -> "StateFieldSchema":
+        """获取内容相同的共享实例，不存在时创建并放入驻留池（default 不可哈希时直接新建）"""
+        # 1、1.0、True 相等且哈希相同，键里带上 default 的类型，避免它们共用同一个实例
+        key = (type, default.__class__, default, description)
+        try:
+            schema = cls._pool.get(key)
+        except TypeError:  # default 为 dict/list 等不可哈希的值
+            return cls(type, default, description)
+        if schema is None:
+            schema = cls._pool[key] = cls(type, default, description)
+        return schema
 
 
-class EdgeDefinition(BaseModel):
-    source: str = Field(..., description="源节点名称")
-    target: str = Field(..., description="目标节点名称")
-    condition: Optional[str] = Field(None, description="条件路由键名")
-
-
-class StateFieldSchema(BaseModel):
-    """定义状态字段的 Schema"""
-    type: str = Field(..., description="字段类型，例如: 'str', 'int', 'List[str]'")
-    default: Any = Field(None, description="字段默认值")
-    description: str = Field("", description="字段描述")
-
 class PlannerConfig(BaseModel):
     """Planner 节点配置"""
     graph_db_name: str = Field(..., description="图数据库名称")
@@ -68,22 +107,30 @@ class AgentConfig(BaseModel):
     workflow_id: str = Field(..., description="引用的工作流 ID")
 
 
-class ExecutionLog(BaseModel):
-    """单次节点执行的详细日志"""
-    node_name: str = Field(..., description="节点名称")
-    node_type: NodeType = Field(..., description="节点类型")
-    timestamp: datetime = Field(default_factory=datetime.now, description="执行时间")
-    input_data: Dict[str, Any] = Field(..., description="输入数据")
-    output_data: Dict[str, Any] = Field(..., description="输出数据")
-    execution_time_ms: float = Field(..., description="执行耗时（毫秒）")
-    error: Optional[str] = Field(None, description="执行错误信息")
+@dataclass(slots=True, kw_only=True)
+class ExecutionLog:
+    """
+    单次节点执行的详细日志
+
+    每次节点执行都会创建一条，使用 slots 数据类: 创建开销小，且 orjson 可直接序列化；
+    kw_only 保持字段顺序与 JSON 输出一致（timestamp 有默认值但排在必填字段之前）
+    """
+    node_name: str  # 节点名称
+    node_type: NodeType  # 节点类型
+    timestamp: datetime = field(default_factory=datetime.now)  # 执行时间
+    input_data: Dict[str, Any]  # 输入数据
+    output_data: Dict[str, Any]  # 输出数据
+    execution_time_ms: float  # 执行耗时（毫秒）
+    error: Optional[str] = None  # 执行错误信息
 
 
-class OperatorLog(BaseModel):
+# 与节点/边定义一样只在注册时构造、之后只读，同样使用 slots 数据类
+@dataclass(slots=True, frozen=True)
+class OperatorLog:
     """操作符日志：记录节点的输入输出 schema"""
-    node_name: str = Field(..., description="节点名称")
-    input_schema: Dict[str, StateFieldSchema] = Field(..., description="操作符输入的状态字段定义")
-    output_schema: Dict[str, StateFieldSchema] = Field(..., description="操作符输出的状态字段定义")
+    node_name: str  # 节点名称
+    input_schema: Dict[str, StateFieldSchema]  # 操作符输入的状态字段定义
+    output_schema: Dict[str, StateFieldSchema]  # 操作符输出的状态字段定义
 
 
 class WorkflowDefinition(BaseModel):
@@ -94,4 +141,30 @@ class WorkflowDefinition(BaseModel):
     entry_point: str = Field(..., description="唯一的入口节点名称")
     state_schema: Dict[str, StateFieldSchema] = Field(..., description="工作流状态的字段定义")
     operator_logs: Dict[str, OperatorLog] = Field(default_factory=dict, description="每个节点的操作符日志")
-    execution_history: List[ExecutionLog] = Field(default_factory=list, description="工作流执行历史")
+    execution_history: Deque[ExecutionLog] = Field(default_factory=deque, description="工作流执行历史（注册后为定长环形缓冲）")
+
+    # 节点名列表、边数在注册时预先计算（见 WorkflowRegistry.register_workflow），查询时直接读取；
+    # 私有属性不参与校验和序列化。
+    # 不额外建立邻接表/CSR 数组: 边列表只在注册编译图时遍历一次（需要每条边的 condition），
+    # 执行时运行编译好的图，没有按节点查后继的代码路径
+    _node_names: Optional[Tuple[str, ...]] = PrivateAttr(default=None)
+    _edges_count: Optional[int] = PrivateAttr(default=None)
+    
+    def index_nodes(self) -> None:
+        """根据当前的 nodes / edges 重新计算节点名列表和边数"""
+        self._node_names = tuple(node.name for node in self.nodes)
+        self._edges_count = len(self.edges)
+    
+    @property
+    def node_names(self) -> Tuple[str, ...]:
+        """节点名列表（按定义顺序）"""
+        if self._node_names is None:
+            self.index_nodes()
+        return self._node_names
+    
+    @property
+    def edges_count(self) -> int:
+        """边的数量"""
+        if self._edges_count is None:
+            self.index_nodes()
+        return self._edges_count